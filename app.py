@@ -1,24 +1,111 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context, g, url_for, make_response
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import inspect, text
-from prometheus_client import Counter, generate_latest, REGISTRY
+from sqlalchemy import inspect, text, select, tuple_, update, delete, any_, bindparam, Integer, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateIndex
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, REGISTRY, CONTENT_TYPE_LATEST
+from prometheus_client import CollectorRegistry, multiprocess
 import os
+import time
 import logging
-import requests
-from datetime import datetime
+import base64
+import hashlib
+import json
+import collections
+import math
+from datetime import datetime, timezone, timedelta
+from types import SimpleNamespace
+from log_shipper import shipper_from_env
+from user_cache import ResponseCache, store_from_url
+from db_metrics import InstrumentedQueuePool, instrument_engine
+from profiler import profiler_from_env
 
 app = Flask(__name__)
 
 # Flask configuration
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+
+# Connection pool sizing. Each gunicorn worker holds up to
+# DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so replicas x workers x that
+# must stay below Postgres max_connections.
+def engine_options(uri):
+    uri = uri or ''
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        # In-memory SQLite needs its default single-connection pool
+        return {}
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '5')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true',
+    }
+    if uri.startswith('postgres'):
+        statement_timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '30000'))
+        options['connect_args'] = {'options': f'-c statement_timeout={statement_timeout}'}
+    return options
+
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+app.config['USERS_PAGE_SIZE'] = int(os.getenv('USERS_PAGE_SIZE', '50'))
+app.config['USERS_MAX_PAGE_SIZE'] = int(os.getenv('USERS_MAX_PAGE_SIZE', '500'))
+app.config['USERS_STREAM_CHUNK'] = int(os.getenv('USERS_STREAM_CHUNK', '1000'))
+app.config['BULK_CHUNK_SIZE'] = int(os.getenv('BULK_CHUNK_SIZE', '1000'))
+app.config['BULK_MAX_ITEMS'] = int(os.getenv('BULK_MAX_ITEMS', '100000'))
+app.config['CACHE_MAX_ENTRIES'] = int(os.getenv('CACHE_MAX_ENTRIES', '1024'))
+app.config['CACHE_TTL'] = int(os.getenv('CACHE_TTL', '30'))
+app.config['CACHE_STORE_URL'] = os.getenv('CACHE_STORE_URL', '')
+# Without a shared store every gunicorn worker has its own generation counter,
+# so a write on one worker would not invalidate the others. Caching is
+# therefore only on by default when a shared store is configured.
+app.config['CACHE_ENABLED'] = os.getenv(
+    'CACHE_ENABLED', 'true' if app.config['CACHE_STORE_URL'] else 'false'
+).lower() == 'true'
 logging.basicConfig(level=logging.DEBUG)
 
 # Initialize SQLAlchemy
 db = SQLAlchemy(app)
+with app.app_context():
+    instrument_engine(db.engine)
 
-# Prometheus metrics
+# Prometheus metrics. Request metrics are recorded by the hooks below for
+# every route except the UNTRACKED_PATHS probes and scrapes.
 REQUESTS = Counter('requests_total', 'Total HTTP Requests', ['method', 'endpoint'])
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response (time to first byte for streams)',
+    ['method', 'route', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'Requests currently being handled', ['method', 'route'],
+    multiprocess_mode='livesum'
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'Response body size (streamed responses are not observed)',
+    ['method', 'route'],
+    buckets=(100, 1000, 10000, 100000, 1000000, 10000000)
+)
+CACHE_HITS = Counter('cache_hits_total', 'User read cache hits', ['tier'])
+CACHE_MISSES = Counter('cache_misses_total', 'User read cache misses')
+CACHE_EVICTIONS = Counter('cache_evictions_total', 'User read cache local evictions', ['reason'])
+
+# Background delivery of log events to the logging service
+log_shipper = shipper_from_env()
+
+# Opt-in sampling profiler for slow requests (PROFILE_SLOW_MS / PROFILE_TOKEN)
+profiler = profiler_from_env()
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+
+# Read-through cache for user reads, invalidated on every write
+if app.config['CACHE_ENABLED'] and not app.config['CACHE_STORE_URL']:
+    logging.warning("CACHE_ENABLED without CACHE_STORE_URL: writes only invalidate the worker that handled them")
+user_cache = ResponseCache(
+    maxsize=app.config['CACHE_MAX_ENTRIES'],
+    ttl=app.config['CACHE_TTL'],
+    store=store_from_url(app.config['CACHE_STORE_URL']),
+    on_evict=lambda reason: CACHE_EVICTIONS.labels(reason=reason).inc()
+) if app.config['CACHE_ENABLED'] else None
 
 # User model
 class User(db.Model):
@@ -28,30 +115,162 @@ class User(db.Model):
     email = db.Column(db.String(100), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
+    # Back keyset pagination and created_at range filters. Email sorting
+    # uses the unique index on email.
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+        db.Index('ix_users_name_id', 'name', 'id'),
+    )
+
+# Postgres-only search indexes, applied by migrate_database(). Prefix
+# search uses the text_pattern_ops indexes on lower(), substring search uses
+# the pg_trgm ones. SQLite has neither and falls back to scans.
+POSTGRES_SEARCH_INDEXES = {
+    'ix_users_name_lower_pattern': "ON users (lower(name) text_pattern_ops)",
+    'ix_users_email_lower_pattern': "ON users (lower(email) text_pattern_ops)",
+    'ix_users_name_trgm': "ON users USING gin (name gin_trgm_ops)",
+    'ix_users_email_trgm': "ON users USING gin (email gin_trgm_ops)",
+}
+
+# Columns GET /users can sort by; prefix with '-' for descending
+USER_SORTS = {
+    'created_at': User.created_at,
+    'name': User.name,
+    'email': User.email,
+}
+
+def serialize_user(user):
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "created_at": user.created_at.isoformat() if user.created_at else None
+    }
+
+def normalizes_timestamps(column):
+    # SQLite stores CURRENT_TIMESTAMP as text without the microseconds
+    # SQLAlchemy writes and binds, so raw text does not compare as time
+    return column is User.created_at and db.engine.dialect.name == 'sqlite'
+
+def sort_key(column):
+    """Return the expression to order ``column`` by, matching what ``comparable`` compares."""
+    if normalizes_timestamps(column):
+        return db.func.strftime('%Y-%m-%d %H:%M:%f', column)
+    return column
+
+def comparable(column, value):
+    """Return ``(column, value)`` expressions that compare correctly on the current database."""
+    if normalizes_timestamps(column):
+        return sort_key(column), db.func.strftime('%Y-%m-%d %H:%M:%f', value)
+    return column, value
+
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def parse_datetime(args, name):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"{name} must be an ISO-8601 datetime")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def user_query(args):
+    """Parse the search, range and sort arguments of GET /users.
+
+    Returns ``(sort, conditions, order_by)``. Raises ValueError for bad input.
+    """
+    sort = args.get('sort', '-created_at')
+    column = USER_SORTS.get(sort.lstrip('-'))
+    if column is None:
+        raise ValueError(f"sort must be one of {', '.join(USER_SORTS)}, optionally prefixed with '-'")
+    descending = sort.startswith('-')
+    # Keyset cursors compare sort_key(column), so the order must use it too
+    key = sort_key(column)
+    order_by = (key.desc(), User.id.desc()) if descending else (key.asc(), User.id.asc())
+
+    conditions = []
+    q = args.get('q', '').strip()
+    if q:
+        match = args.get('match', 'prefix')
+        term = escape_like(q.lower())
+        if match == 'prefix':
+            # lower(col) LIKE 'abc%' can use the text_pattern_ops indexes
+            pattern = f"{term}%"
+            conditions.append(or_(db.func.lower(User.name).like(pattern, escape='\\'),
+                                  db.func.lower(User.email).like(pattern, escape='\\')))
+        elif match == 'substring':
+            # ILIKE '%abc%' can use the pg_trgm indexes
+            pattern = f"%{term}%"
+            conditions.append(or_(User.name.ilike(pattern, escape='\\'),
+                                  User.email.ilike(pattern, escape='\\')))
+        else:
+            raise ValueError("match must be 'prefix' or 'substring'")
+    created_after = parse_datetime(args, 'created_after')
+    if created_after:
+        column_expr, value = comparable(User.created_at, created_after)
+        conditions.append(column_expr >= value)
+    created_before = parse_datetime(args, 'created_before')
+    if created_before:
+        column_expr, value = comparable(User.created_at, created_before)
+        conditions.append(column_expr < value)
+    return sort, conditions, order_by
+
+# Keyset pagination cursors encode the sort and the (sort value, id) of the last row served
+def encode_cursor(sort, value, user_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, user_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, sort):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, value, user_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if cursor_sort != sort:
+            raise ValueError
+        if sort.lstrip('-') == 'created_at':
+            value = datetime.fromisoformat(value)
+        return value, int(user_id)
+    except (ValueError, TypeError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def keyset_after(sort, value, user_id):
+    column, value = comparable(USER_SORTS[sort.lstrip('-')], value)
+    key, last = tuple_(column, User.id), tuple_(value, user_id)
+    return key < last if sort.startswith('-') else key > last
+
 # Wait for database to be ready
 def wait_for_database():
-    import time
-    from sqlalchemy import create_engine
     from sqlalchemy.exc import OperationalError
     retries = 15
     delay = 5
-    engine = create_engine(app.config['SQLALCHEMY_DATABASE_URI'])
-    for i in range(retries):
-        try:
-            connection = engine.connect()
-            connection.close()
-            return True
-        except OperationalError:
-            print(f"Waiting for database... (attempt {i+1}/{retries})")
-            time.sleep(delay)
+    with app.app_context():
+        for i in range(retries):
+            try:
+                with db.engine.connect():
+                    pass
+                return True
+            except OperationalError:
+                print(f"Waiting for database... (attempt {i+1}/{retries})")
+                time.sleep(delay)
     return False
 
-# Initialize database and tables
+# Initialize database and tables. Building indexes on an existing table can
+# take minutes, so that is left to migrate_database(), which runs once before
+# the workers start.
 def initialize_database():
     try:
         with app.app_context():
-            result = db.session.execute(text("SELECT current_database();"))
-            current_db = result.scalar()
+            if db.engine.dialect.name == 'postgresql':
+                current_db = db.session.execute(text("SELECT current_database();")).scalar()
+            else:
+                # SQLite (local runs and benchmarks) has no current_database()
+                current_db = db.engine.url.database
             print(f"Connected to database: {current_db}")
             inspector = inspect(db.engine)
             if not inspector.has_table('users'):
@@ -63,50 +282,207 @@ def initialize_database():
         print(f"Database initialization failed: {str(e)}")
         raise
 
+# Any constant works as long as every replica uses the same one
+MIGRATION_LOCK_ID = 7301
+
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """Create missing tables and indexes. Run once before starting gunicorn."""
+    initialize_database()
+    migrate_database()
+
+def migrate_database():
+    """Build the User model's indexes and the Postgres search indexes if missing.
+
+    On Postgres every index is built with CREATE INDEX CONCURRENTLY so writes
+    keep flowing. That cannot run in a transaction and can outlast
+    DB_STATEMENT_TIMEOUT_MS, so the connection is in autocommit with the
+    timeout lifted. Replicas starting together take turns through an
+    advisory lock, so an invalid index found while holding it is the remains
+    of a build that died, and is dropped and rebuilt. Failures are logged,
+    never raised.
+    """
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            for index in User.__table__.indexes:
+                try:
+                    index.create(db.engine, checkfirst=True)
+                except Exception as e:
+                    print(f"Skipped creating index {index.name}: {str(e)}")
+            return
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            connection.execute(text("SET statement_timeout = 0"))
+            try:
+                for index in User.__table__.indexes:
+                    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=db.engine.dialect))
+                    create_index_concurrently(
+                        connection, index.name, ddl.replace('CREATE INDEX', 'CREATE INDEX CONCURRENTLY', 1))
+                try:
+                    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                except Exception as e:
+                    # The trigram indexes below then fail and are skipped too
+                    print(f"Skipped creating the pg_trgm extension: {str(e)}")
+                for name, definition in POSTGRES_SEARCH_INDEXES.items():
+                    create_index_concurrently(
+                        connection, name, f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}")
+            finally:
+                connection.execute(text("RESET statement_timeout"))
+                connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+
+def index_is_valid(connection, name):
+    """Return whether index ``name`` is valid, or None if it does not exist."""
+    return connection.execute(text(
+        "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name"
+    ), {"name": name}).scalar()
+
+def create_index_concurrently(connection, name, statement):
+    try:
+        if index_is_valid(connection, name) is False:
+            # IF NOT EXISTS would skip it forever
+            print(f"Dropping index {name} left invalid by an interrupted build")
+            connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+        connection.execute(text(statement))
+        print(f"Index {name} is in place")
+    except Exception as e:
+        # A failed concurrent build leaves an invalid index, which the next run drops
+        print(f"Skipped creating index {name}: {str(e)}")
+
 # Helper function to log actions to the logging service
 def log_action(event, user_id=None, details=None):
+    payload = {
+        "event": event,
+        "user_id": user_id,
+        "details": details or {},
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    log_shipper.submit(payload)
+
+# Cached reads. Stored entries carry the body and the headers needed to replay it.
+CACHED_HEADERS = ('X-Next-Cursor', 'Link')
+
+def cached_response(render, bucket=''):
+    """Serve the current GET request from the user cache, calling ``render`` on a miss.
+
+    Conditional requests whose ETag still matches the current generation get
+    a 304 without touching the database. If-Modified-Since is not trusted:
+    second-resolution timestamps cannot tell apart writes made in the same
+    second as the read, so Last-Modified is informational only. Pages that
+    also depend on the clock pass a ``bucket`` (e.g. the current minute),
+    which is part of the key and ETag so they expire without a write.
+    """
+    if user_cache is None:
+        return render()
     try:
-        payload = {
-            "event": event,
-            "user_id": user_id,
-            "details": details or {},
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        requests.post("http://logging-service:5001/logs", json=payload, timeout=2)
-    except requests.RequestException as e:
-        logging.error(f"Failed to send log to logging service: {str(e)}")
+        generation, modified = user_cache.generation()
+        key = f"{generation}:{bucket}:{request.full_path}"
+        entry, tier = user_cache.get(key)
+    except Exception as e:
+        logging.error(f"Cache lookup failed: {str(e)}")
+        return render()
+
+    etag = hashlib.sha1(key.encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        CACHE_HITS.labels(tier='not_modified').inc()
+        response = Response(status=304)
+    elif entry is not None:
+        CACHE_HITS.labels(tier=tier).inc()
+        response = Response(entry['body'], mimetype=entry['mimetype'], headers=entry['headers'])
+    else:
+        CACHE_MISSES.inc()
+        response = render()
+        if isinstance(response, tuple) or response.status_code != 200:
+            return response
+        try:
+            user_cache.set(key, {
+                "body": response.get_data(as_text=True),
+                "mimetype": response.mimetype,
+                "headers": {h: response.headers[h] for h in CACHED_HEADERS if h in response.headers}
+            })
+        except Exception as e:
+            logging.error(f"Cache store failed: {str(e)}")
+    response.set_etag(etag)
+    if user_cache.store is not None:
+        # Only the shared store's timestamp means the same thing on every
+        # worker. Round up so it is never earlier than the write it reflects.
+        response.last_modified = datetime.fromtimestamp(math.ceil(modified), timezone.utc)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def invalidate_user_cache():
+    if user_cache is not None:
+        user_cache.invalidate()
 
 # Run initialization on startup
 if wait_for_database():
     initialize_database()
+    # Don't hand startup connections to forked gunicorn workers
+    with app.app_context():
+        db.engine.dispose()
+
+# Request instrumentation
+UNTRACKED_PATHS = ('/health', '/metrics')
+
+@app.before_request
+def start_request_metrics():
+    if request.path in UNTRACKED_PATHS:
+        return
+    # Label by route template rather than path to keep label cardinality bounded
+    g.route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.request_start = time.perf_counter()
+    REQUESTS_IN_FLIGHT.labels(method=request.method, route=g.route).inc()
+    g.in_flight = True
+    forced = bool(PROFILE_TOKEN) and request.headers.get('X-Profile') == PROFILE_TOKEN
+    if profiler is not None and (forced or profiler.threshold_ms):
+        g.profiling = 'forced' if forced else 'threshold'
+        profiler.start()
+
+@app.after_request
+def record_request_metrics(response):
+    if 'request_start' not in g:
+        return response
+    duration = time.perf_counter() - g.request_start
+    REQUESTS.labels(method=request.method, endpoint=g.route).inc()
+    REQUEST_DURATION.labels(method=request.method, route=g.route, status=response.status_code).observe(duration)
+    if not response.is_streamed:
+        RESPONSE_SIZE.labels(method=request.method, route=g.route).observe(response.calculate_content_length() or 0)
+    if 'profiling' in g:
+        stacks = profiler.stop()
+        duration_ms = duration * 1000
+        forced = g.profiling == 'forced'
+        if forced or (profiler.threshold_ms and duration_ms >= profiler.threshold_ms):
+            path = profiler.dump(stacks, request.method, g.route, duration_ms)
+            if path and forced:
+                response.headers['X-Profile-File'] = os.path.basename(path)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    # Streamed responses tear down twice: once when the view returns and
+    # again when stream_with_context finishes, so only decrement once
+    if g.pop('in_flight', False):
+        REQUESTS_IN_FLIGHT.labels(method=request.method, route=g.route).dec()
+    if 'profiling' in g:
+        # No-op if after_request already collected the profile
+        profiler.stop()
 
 # Routes
 @app.route('/')
 def index():
-    REQUESTS.labels(method='GET', endpoint='/').inc()
-    try:
-        users = User.query.order_by(User.created_at.desc()).all()
-        return render_template('index.html', users=users)
-    except Exception as e:
-        print(f"Failed to fetch users: {str(e)}")
-        log_action("fetch_users_failed", details={"error": str(e)})
-        return jsonify({"error": "Database operation failed"}), 500
+    # The users table is paged in by static/js/main.js, so nothing is queried here
+    return render_template('index.html')
 
 @app.route('/users', methods=['POST'])
 def add_user():
-    REQUESTS.labels(method='POST', endpoint='/users').inc()
     try:
         data = request.get_json()
         new_user = User(name=data['name'], email=data['email'])
         db.session.add(new_user)
         db.session.commit()
+        invalidate_user_cache()
         log_action("user_added", new_user.id, {"name": new_user.name, "email": new_user.email})
-        return jsonify({
-            "id": new_user.id,
-            "name": new_user.name,
-            "email": new_user.email,
-            "created_at": new_user.created_at.isoformat()
-        }), 201
+        return jsonify(serialize_user(new_user)), 201
     except Exception as e:
         logging.error(f"User creation failed: {str(e)}")
         log_action("user_add_failed", details={"error": str(e), "data": data})
@@ -114,24 +490,149 @@ def add_user():
 
 @app.route('/users', methods=['GET'])
 def get_users():
-    REQUESTS.labels(method='GET', endpoint='/users').inc()
-    try:
-        users = User.query.order_by(User.created_at.desc()).all()
-        log_action("users_fetched", details={"count": len(users)})
-        return jsonify([{
-            "id": u.id,
-            "name": u.name,
-            "email": u.email,
-            "created_at": u.created_at.isoformat()
-        } for u in users])
+    stream = request.args.get('stream')
+    if stream:
+        if stream not in ('ndjson', 'json'):
+            return jsonify({"error": "stream must be 'ndjson' or 'json'"}), 400
+        try:
+            _, conditions, order_by = user_query(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return export_users(stream, conditions, order_by)
+    return cached_response(list_users)
+
+def list_users():
+    try:
+        sort, conditions, order_by = user_query(request.args)
+        if request.args.get('count', '').lower() in ('1', 'true'):
+            total = db.session.scalar(select(db.func.count()).select_from(User).where(*conditions))
+            log_action("users_counted", details={"count": total})
+            return jsonify({"count": total})
+        limit = request.args.get('limit', app.config['USERS_PAGE_SIZE'], type=int)
+        limit = max(1, min(limit, app.config['USERS_MAX_PAGE_SIZE']))
+        query = User.query.filter(*conditions).order_by(*order_by)
+        cursor = request.args.get('cursor')
+        if cursor:
+            query = query.filter(keyset_after(sort, *decode_cursor(cursor, sort)))
+        # Fetch one extra row to know whether another page exists
+        users = query.limit(limit + 1).all()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Failed to fetch users: {str(e)}")
         log_action("fetch_users_failed", details={"error": str(e)})
         return jsonify({"error": "Database operation failed"}), 500
+    page, has_more = users[:limit], len(users) > limit
+    log_action("users_fetched", details={"count": len(page)})
+    response = jsonify([serialize_user(u) for u in page])
+    if has_more:
+        last = page[-1]
+        next_cursor = encode_cursor(sort, getattr(last, sort.lstrip('-')), last.id)
+        response.headers['X-Next-Cursor'] = next_cursor
+        next_args = dict(request.args.to_dict(), limit=limit, cursor=next_cursor)
+        response.headers['Link'] = f'<{url_for("get_users", **next_args)}>; rel="next"'
+    return response
+
+def export_users(fmt, conditions, order_by):
+    """Stream matching users as NDJSON or a JSON array, reading rows in server-side chunks."""
+    chunk = app.config['USERS_STREAM_CHUNK']
+    statement = (
+        select(User.id, User.name, User.email, User.created_at)
+        .where(*conditions)
+        .order_by(*order_by)
+        .execution_options(yield_per=chunk)
+    )
+
+    separator = ',' if fmt == 'json' else '\n'
+
+    def generate():
+        count = 0
+        try:
+            if fmt == 'json':
+                yield '['
+            for rows in db.session.execute(statement).partitions():
+                body = separator.join(app.json.dumps(serialize_user(row)) for row in rows)
+                if fmt == 'json':
+                    yield (',' if count else '') + body
+                else:
+                    yield body + '\n'
+                count += len(rows)
+            if fmt == 'json':
+                yield ']'
+            log_action("users_exported", details={"count": count, "format": fmt})
+        except Exception as e:
+            # Headers are already sent, so the truncated body is all the client sees
+            logging.error(f"User export failed after {count} rows: {str(e)}")
+            log_action("export_users_failed", details={"error": str(e), "count": count})
+            raise
+
+    mimetype = 'application/json' if fmt == 'json' else 'application/x-ndjson'
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+@app.route('/users/<int:user_id>', methods=['GET'])
+def get_user(user_id):
+    return cached_response(lambda: render_user(user_id))
+
+def render_user(user_id):
+    try:
+        user = db.session.get(User, user_id)
+    except Exception as e:
+        print(f"Failed to fetch user: {str(e)}")
+        log_action("fetch_user_failed", user_id, {"error": str(e)})
+        return jsonify({"error": "Database operation failed"}), 500
+    if user is None:
+        return jsonify({"error": f"User {user_id} not found"}), 404
+    return jsonify(serialize_user(user))
+
+@app.route('/dashboard')
+def dashboard():
+    # The stats cover the last 24 hours and 7 days, so they change with the clock too
+    return cached_response(render_dashboard, bucket=datetime.utcnow().strftime('%Y-%m-%dT%H:%M'))
+
+def render_dashboard():
+    """Render dashboard stats from aggregate queries instead of loading every user."""
+    try:
+        now = datetime.utcnow()
+        count = db.func.count()
+        total_users = db.session.scalar(select(count).select_from(User))
+        column, since = comparable(User.created_at, now - timedelta(hours=24))
+        new_users_today = db.session.scalar(select(count).select_from(User).where(column >= since))
+
+        if db.engine.dialect.name == 'postgresql':
+            domain = db.func.split_part(User.email, '@', 2)
+        else:
+            domain = db.func.substr(User.email, db.func.instr(User.email, '@') + 1)
+        top = db.session.execute(
+            select(domain, count).group_by(domain).order_by(count.desc()).limit(1)
+        ).first()
+
+        recent_users = User.query.order_by(User.created_at.desc(), User.id.desc()).limit(10).all()
+
+        first_day = (now - timedelta(days=6)).replace(hour=0, minute=0, second=0, microsecond=0)
+        day = db.func.date(User.created_at)
+        column, since = comparable(User.created_at, first_day)
+        per_day = {str(d): n for d, n in db.session.execute(
+            select(day, count).where(column >= since).group_by(day)
+        )}
+        labels = [(first_day + timedelta(days=i)).date().isoformat() for i in range(7)]
+    except Exception as e:
+        print(f"Failed to build dashboard: {str(e)}")
+        log_action("dashboard_failed", details={"error": str(e)})
+        return jsonify({"error": "Database operation failed"}), 500
+    return make_response(render_template(
+        'dashboard.html',
+        stats={
+            "total_users": total_users,
+            "new_users_today": new_users_today,
+            "top_domain": top[0] if top else "-",
+        },
+        recent_users=recent_users,
+        # An attribute object, since the template's chart_data.values would hit dict.values
+        chart_data=SimpleNamespace(labels=labels, values=[per_day.get(label, 0) for label in labels]),
+    ))
 
 @app.route('/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
-    REQUESTS.labels(method='PUT', endpoint='/users/<id>').inc()
     try:
         data = request.get_json()
         user = User.query.get_or_404(user_id)
@@ -139,16 +640,12 @@ def update_user(user_id):
         user.name = data.get('name', user.name)
         user.email = data.get('email', user.email)
         db.session.commit()
+        invalidate_user_cache()
         log_action("user_updated", user_id, {
             "old": {"name": old_name, "email": old_email},
             "new": {"name": user.name, "email": user.email}
         })
-        return jsonify({
-            "id": user.id,
-            "name": user.name,
-            "email": user.email,
-            "created_at": user.created_at.isoformat()
-        })
+        return jsonify(serialize_user(user))
     except Exception as e:
         logging.error(f"User update failed: {str(e)}")
         log_action("user_update_failed", user_id, {"error": str(e), "data": data})
@@ -156,11 +653,11 @@ def update_user(user_id):
 
 @app.route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
-    REQUESTS.labels(method='DELETE', endpoint='/users/<id>').inc()
     try:
         user = User.query.get_or_404(user_id)
         db.session.delete(user)
         db.session.commit()
+        invalidate_user_cache()
         log_action("user_deleted", user_id, {"name": user.name, "email": user.email})
         return jsonify({"message": f"User {user_id} deleted"}), 200
     except Exception as e:
@@ -168,15 +665,217 @@ def delete_user(user_id):
         log_action("user_delete_failed", user_id, {"error": str(e)})
         return jsonify({"error": "Database operation failed", "details": str(e)}), 500
 
+# Bulk operations
+def parse_bulk_body():
+    """Read a JSON array or NDJSON request body into a list of items."""
+    if request.mimetype == 'application/x-ndjson':
+        items = []
+        for number, line in enumerate(request.get_data(as_text=True).splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                raise ValueError(f"Invalid JSON on line {number}")
+    else:
+        items = request.get_json(silent=True)
+        if not isinstance(items, list):
+            raise ValueError("Expected a JSON array or NDJSON body")
+    if len(items) > app.config['BULK_MAX_ITEMS']:
+        raise ValueError(f"At most {app.config['BULK_MAX_ITEMS']} items per request")
+    return items
+
+def bulk_chunk_size():
+    size = request.args.get('chunk_size', app.config['BULK_CHUNK_SIZE'], type=int)
+    return max(1, min(size, app.config['BULK_CHUNK_SIZE']))
+
+def apply_in_chunks(pending, chunk_size, execute):
+    """Run ``execute`` over ``(index, item)`` pairs one chunk per transaction.
+
+    ``execute`` returns a dict of index -> result for the chunk. If a chunk
+    fails it is replayed item by item inside savepoints, so one bad row only
+    fails itself rather than its whole chunk.
+    """
+    results = {}
+    try:
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            try:
+                chunk_results = execute(chunk)
+                db.session.commit()
+                results.update(chunk_results)
+                continue
+            except Exception as e:
+                db.session.rollback()
+                logging.warning(f"Bulk chunk of {len(chunk)} failed, retrying per item: {str(e)}")
+            for index, item in chunk:
+                try:
+                    with db.session.begin_nested():
+                        results.update(execute([(index, item)]))
+                except Exception as e:
+                    results[index] = {"status": "error", "error": str(e)}
+            db.session.commit()
+    finally:
+        # Earlier chunks stay committed even if a later one blows up
+        if pending:
+            invalidate_user_cache()
+    return results
+
+def bulk_response(event, items, results):
+    ordered = [{"index": i, **results[i]} for i in range(len(items))]
+    summary = dict(collections.Counter(r["status"] for r in ordered), received=len(items))
+    log_action(event, details=summary)
+    failed = any(r["status"] == "error" for r in ordered)
+    return jsonify({"summary": summary, "results": ordered}), 207 if failed else 200
+
+def users_insert(rows, on_conflict):
+    dialect = postgresql if db.engine.dialect.name == 'postgresql' else sqlite
+    table = User.__table__
+    statement = dialect.insert(table).values(rows)
+    if on_conflict == 'update':
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.email], set_={"name": statement.excluded.name})
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=[table.c.email])
+    return statement.returning(table.c.id, table.c.email)
+
+def is_user_id(value):
+    # JSON true/false decode to bool, which is an int subclass
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def users_id_in(ids):
+    column = User.__table__.c.id
+    if db.engine.dialect.name == 'postgresql':
+        # One array parameter keeps the statement text identical whatever the batch size
+        return column == any_(bindparam('ids', ids, type_=postgresql.ARRAY(Integer)))
+    return column.in_(ids)
+
+@app.route('/users/bulk', methods=['POST'])
+def bulk_add_users():
+    on_conflict = request.args.get('on_conflict', 'skip')
+    if on_conflict not in ('skip', 'update'):
+        return jsonify({"error": "on_conflict must be 'skip' or 'update'"}), 400
+    try:
+        items = parse_bulk_body()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results, pending, seen = {}, [], set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get('name') or not item.get('email'):
+            results[index] = {"status": "error", "error": "name and email are required"}
+        elif item['email'] in seen:
+            results[index] = {"status": "error", "error": "Duplicate email in request"}
+        else:
+            seen.add(item['email'])
+            pending.append((index, {"name": item['name'], "email": item['email']}))
+
+    def execute(chunk):
+        statement = users_insert([row for _, row in chunk], on_conflict)
+        returned = {row.email: row.id for row in db.session.execute(statement)}
+        created = 'upserted' if on_conflict == 'update' else 'created'
+        return {
+            index: {"status": created, "id": returned[row['email']]} if row['email'] in returned
+            else {"status": "skipped", "error": "Email already exists"}
+            for index, row in chunk
+        }
+
+    try:
+        results.update(apply_in_chunks(pending, bulk_chunk_size(), execute))
+    except Exception as e:
+        logging.error(f"Bulk user creation failed: {str(e)}")
+        log_action("users_bulk_add_failed", details={"error": str(e), "received": len(items)})
+        return jsonify({"error": "Database operation failed", "details": str(e)}), 500
+    return bulk_response("users_bulk_added", items, results)
+
+@app.route('/users/bulk', methods=['PATCH'])
+def bulk_update_users():
+    try:
+        items = parse_bulk_body()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results, pending, seen = {}, [], set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not is_user_id(item.get('id')):
+            results[index] = {"status": "error", "error": "Integer id is required"}
+            continue
+        changes = {key: item[key] for key in ('name', 'email') if item.get(key)}
+        if not changes:
+            results[index] = {"status": "error", "error": "Nothing to update"}
+        elif item['id'] in seen:
+            results[index] = {"status": "error", "error": "Duplicate id in request"}
+        else:
+            seen.add(item['id'])
+            pending.append((index, {"id": item['id'], **changes}))
+
+    def execute(chunk):
+        ids = [row['id'] for _, row in chunk]
+        existing = set(db.session.scalars(select(User.id).where(users_id_in(ids))))
+        found = [row for _, row in chunk if row['id'] in existing]
+        if found:
+            # ORM bulk UPDATE by primary key: one executemany per distinct key set
+            db.session.execute(update(User), found)
+        return {
+            index: {"status": "updated", "id": row['id']} if row['id'] in existing
+            else {"status": "error", "error": "User not found", "id": row['id']}
+            for index, row in chunk
+        }
+
+    try:
+        results.update(apply_in_chunks(pending, bulk_chunk_size(), execute))
+    except Exception as e:
+        logging.error(f"Bulk user update failed: {str(e)}")
+        log_action("users_bulk_update_failed", details={"error": str(e), "received": len(items)})
+        return jsonify({"error": "Database operation failed", "details": str(e)}), 500
+    return bulk_response("users_bulk_updated", items, results)
+
+@app.route('/users/bulk', methods=['DELETE'])
+def bulk_delete_users():
+    try:
+        items = parse_bulk_body()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results, pending = {}, []
+    for index, item in enumerate(items):
+        user_id = item.get('id') if isinstance(item, dict) else item
+        if not is_user_id(user_id):
+            results[index] = {"status": "error", "error": "Integer id is required"}
+        else:
+            pending.append((index, user_id))
+
+    def execute(chunk):
+        ids = [user_id for _, user_id in chunk]
+        statement = delete(User.__table__).where(users_id_in(ids)).returning(User.__table__.c.id)
+        deleted = set(db.session.scalars(statement))
+        return {
+            index: {"status": "deleted", "id": user_id} if user_id in deleted
+            else {"status": "error", "error": "User not found", "id": user_id}
+            for index, user_id in chunk
+        }
+
+    try:
+        results.update(apply_in_chunks(pending, bulk_chunk_size(), execute))
+    except Exception as e:
+        logging.error(f"Bulk user deletion failed: {str(e)}")
+        log_action("users_bulk_delete_failed", details={"error": str(e), "received": len(items)})
+        return jsonify({"error": "Database operation failed", "details": str(e)}), 500
+    return bulk_response("users_bulk_deleted", items, results)
+
 @app.route('/health')
 def health():
-    REQUESTS.labels(method='GET', endpoint='/health').inc()
     return jsonify({"status": "healthy"}), 200
 
 @app.route('/metrics')
 def metrics():
-    REQUESTS.labels(method='GET', endpoint='/metrics').inc()
-    return generate_latest(REGISTRY), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        # Under gunicorn each worker writes its samples to the shared directory
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), 200, {'Content-Type': CONTENT_TYPE_LATEST}
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
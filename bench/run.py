@@ -0,0 +1,418 @@
+"""Load generator and latency benchmark for the web app's CRUD endpoints.
+
+Starts a local stack (the web app on SQLite or a given database, plus a stub
+logging service) unless ``--target`` points at one that is already running.
+It replays a synthetic request mix or a recorded JSONL file at a fixed
+concurrency, then writes per-endpoint p50/p95/p99 latency and req/s to a
+JSON file. Pass ``--compare`` with an earlier result file to flag
+regressions between commits.
+
+    python bench/run.py --mix read-heavy --concurrency 16 --duration 30 --output bench-read.json
+    python bench/run.py --mix write-heavy --compare bench-write-main.json
+    python bench/run.py --replay recorded.jsonl --target http://localhost:9000
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIN_COMPARE_SAMPLES = 30
+
+
+# Request mixes: (weight, operation) pairs. Each operation takes the shared
+# run state and returns (label, method, path, json_body).
+
+def list_users(state):
+    return 'GET /users', 'GET', '/users?limit=50', None
+
+def list_users_next_page(state):
+    cursor = state.cursor
+    if cursor is None:
+        return list_users(state)
+    return 'GET /users?cursor', 'GET', f'/users?limit=50&cursor={cursor}', None
+
+def export_users(state):
+    return 'GET /users?stream', 'GET', '/users?stream=ndjson', None
+
+def search_users(state):
+    return 'GET /users?q', 'GET', '/users?q=bench-a&limit=50', None
+
+def get_user(state):
+    user_id = state.random_id()
+    if user_id is None:
+        return list_users(state)
+    return 'GET /users/<id>', 'GET', f'/users/{user_id}', None
+
+def count_users(state):
+    return 'GET /users?count', 'GET', '/users?count=1', None
+
+def create_user(state):
+    return 'POST /users', 'POST', '/users', new_user()
+
+def update_user(state):
+    user_id = state.random_id()
+    if user_id is None:
+        return create_user(state)
+    return 'PUT /users/<id>', 'PUT', f'/users/{user_id}', {"name": f"renamed-{uuid.uuid4().hex[:8]}"}
+
+def delete_user(state):
+    user_id = state.take_id()
+    if user_id is None:
+        return create_user(state)
+    return 'DELETE /users/<id>', 'DELETE', f'/users/{user_id}', None
+
+def bulk_create(state):
+    return 'POST /users/bulk', 'POST', '/users/bulk', [new_user() for _ in range(state.bulk_size)]
+
+def bulk_update(state):
+    ids = state.sample_ids(state.bulk_size)
+    if not ids:
+        return bulk_create(state)
+    return 'PATCH /users/bulk', 'PATCH', '/users/bulk', [
+        {"id": user_id, "name": f"renamed-{uuid.uuid4().hex[:8]}"} for user_id in ids
+    ]
+
+def bulk_delete(state):
+    ids = [user_id for user_id in (state.take_id() for _ in range(state.bulk_size)) if user_id is not None]
+    if not ids:
+        return bulk_create(state)
+    return 'DELETE /users/bulk', 'DELETE', '/users/bulk', ids
+
+MIXES = {
+    'read-heavy': [
+        (45, list_users), (20, list_users_next_page), (1, export_users),
+        (8, search_users), (10, get_user), (2, count_users),
+        (8, create_user), (4, update_user), (2, delete_user),
+    ],
+    'write-heavy': [
+        (15, list_users), (5, list_users_next_page),
+        (40, create_user), (30, update_user), (10, delete_user),
+    ],
+    'bulk': [
+        (50, bulk_create), (30, bulk_update), (20, bulk_delete),
+    ],
+}
+
+
+def new_user():
+    token = uuid.uuid4().hex[:12]
+    return {"name": f"bench-{token}", "email": f"bench-{token}@example.com"}
+
+
+class RunState:
+    """User ids and pagination cursors shared between worker threads."""
+
+    def __init__(self, bulk_size):
+        self.bulk_size = bulk_size
+        self.cursor = None
+        self._ids = []
+        self._lock = threading.Lock()
+
+    def add_ids(self, ids):
+        with self._lock:
+            self._ids.extend(ids)
+
+    def random_id(self):
+        with self._lock:
+            return random.choice(self._ids) if self._ids else None
+
+    def sample_ids(self, count):
+        with self._lock:
+            return random.sample(self._ids, min(count, len(self._ids)))
+
+    def take_id(self):
+        with self._lock:
+            if not self._ids:
+                return None
+            index = random.randrange(len(self._ids))
+            self._ids[index], self._ids[-1] = self._ids[-1], self._ids[index]
+            return self._ids.pop()
+
+    def observe(self, method, path, response):
+        """Track ids created by the run and the latest next-page cursor."""
+        if response.status_code >= 400:
+            return
+        if method == 'GET' and path.startswith('/users?limit'):
+            self.cursor = response.headers.get('X-Next-Cursor')
+        elif method == 'POST' and path == '/users':
+            self.add_ids([response.json()['id']])
+        elif method == 'POST' and path == '/users/bulk':
+            self.add_ids([r['id'] for r in response.json()['results'] if 'id' in r])
+
+
+def synthetic_requests(mix, state):
+    weights, operations = zip(*MIXES[mix])
+    while True:
+        yield random.choices(operations, weights)[0](state)
+
+
+def replayed_requests(path):
+    """Cycle through a JSONL file of {"method", "path", "body"} records forever."""
+    with open(path) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    if not records:
+        raise SystemExit(f"No requests in {path}")
+    while True:
+        for record in records:
+            method = record.get('method', 'GET').upper()
+            path = record['path']
+            template = re.sub(r'/\d+', '/<id>', path.split('?')[0])
+            label = record.get('label') or f"{method} {template}"
+            yield label, method, path, record.get('body')
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples, errors, elapsed):
+    latencies = sorted(samples)
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+    return {
+        "count": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1]) if latencies else None,
+    }
+
+
+def run_load(base_url, requests_iter, state, concurrency, duration, warmup, max_requests):
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    source_lock = threading.Lock()
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+    issued = [0]
+
+    def worker():
+        session = requests.Session()
+        while True:
+            with source_lock:
+                if time.perf_counter() >= stop_at or (max_requests and issued[0] >= max_requests):
+                    return
+                issued[0] += 1
+                label, method, path, body = next(requests_iter)
+            began = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, json=body, timeout=60)
+                failed = response.status_code >= 500
+            except requests.RequestException:
+                response, failed = None, True
+            took = time.perf_counter() - began
+            if response is not None:
+                try:
+                    state.observe(method, path, response)
+                except ValueError:
+                    pass
+            if began < measure_from:
+                continue
+            with lock:
+                samples[label].append(took)
+                if failed:
+                    errors[label] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(worker) for _ in range(concurrency)]
+    for future in futures:
+        future.result()
+    elapsed = time.perf_counter() - measure_from
+
+    endpoints = {label: summarize(samples[label], errors[label], elapsed) for label in sorted(samples)}
+    overall = summarize([t for values in samples.values() for t in values], sum(errors.values()), elapsed)
+    return endpoints, overall, elapsed
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_healthy(url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Server exited with code {process.returncode}")
+        try:
+            if requests.get(url + '/health', timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"Server at {url} did not become healthy within {timeout}s")
+
+
+def start_stack(args, workdir):
+    """Start the stub logging service and the web app, returning (base_url, processes)."""
+    log_port, web_port = free_port(), free_port()
+    processes = [subprocess.Popen([
+        sys.executable, os.path.join(REPO_ROOT, 'bench', 'stub_logging_service.py'),
+        '--port', str(log_port), '--delay', str(args.log_delay),
+    ])]
+    env = dict(os.environ)
+    env['DATABASE_URL'] = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env['LOGGING_SERVICE_URL'] = f"http://127.0.0.1:{log_port}"
+    for item in args.env:
+        key, _, value = item.partition('=')
+        env[key] = value
+    if args.workers:
+        command = [sys.executable, '-m', 'gunicorn', '-w', str(args.workers),
+                   '-b', f'127.0.0.1:{web_port}', '--log-level', 'warning', 'app:app']
+    else:
+        command = [sys.executable, '-c',
+                   f"from app import app; app.run(host='127.0.0.1', port={web_port}, threaded=True)"]
+    processes.append(subprocess.Popen(command, cwd=REPO_ROOT, env=env,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+    base_url = f"http://127.0.0.1:{web_port}"
+    wait_until_healthy(base_url, processes[-1])
+    return base_url, processes
+
+
+def seed(base_url, state, count):
+    session = requests.Session()
+    for start in range(0, count, 1000):
+        batch = [new_user() for _ in range(min(1000, count - start))]
+        response = session.post(base_url + '/users/bulk', json=batch, timeout=120)
+        response.raise_for_status()
+        state.add_ids([r['id'] for r in response.json()['results'] if 'id' in r])
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, max_regression):
+    """Print per-endpoint deltas and return True if any endpoint regressed beyond ``max_regression``."""
+    regressed = False
+    print(f"\n{'endpoint':<24} {'p95 ms (base -> now)':>26} {'req/s (base -> now)':>26}")
+    for label, now in current['endpoints'].items():
+        base = baseline.get('endpoints', {}).get(label)
+        if not base or not base.get('p95_ms') or not now.get('p95_ms'):
+            continue
+        if min(base['count'], now['count']) < MIN_COMPARE_SAMPLES:
+            # Too few samples for the percentiles to mean anything
+            continue
+        slower = now['p95_ms'] / base['p95_ms'] - 1
+        fewer = 1 - now['rps'] / base['rps'] if base['rps'] else 0
+        flag = ''
+        if slower > max_regression or fewer > max_regression:
+            flag, regressed = '  REGRESSION', True
+        print(f"{label:<24} {base['p95_ms']:>11.2f} -> {now['p95_ms']:<11.2f} "
+              f"{base['rps']:>11.2f} -> {now['rps']:<11.2f}{flag}")
+    return regressed
+
+
+def print_report(result):
+    print(f"\n{'endpoint':<24} {'count':>8} {'err':>5} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = list(result['endpoints'].items()) + [('overall', result['overall'])]
+    for label, stats in rows:
+        if not stats['count']:
+            continue
+        print(f"{label:<24} {stats['count']:>8} {stats['errors']:>5} {stats['rps']:>9.2f} "
+              f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--mix', choices=sorted(MIXES), default='read-heavy', help='Synthetic request mix')
+    source.add_argument('--replay', metavar='FILE', help='JSONL file of {"method", "path", "body"} requests')
+    parser.add_argument('--target', help='Base URL of a running stack; skips starting a local one')
+    parser.add_argument('--database-url', help='Database for the local stack (default: a temporary SQLite file)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Run the local app under gunicorn with this many workers (default: threaded dev server)')
+    parser.add_argument('--env', action='append', default=[], metavar='KEY=VALUE',
+                        help='Extra environment for the local app, e.g. CACHE_ENABLED=false')
+    parser.add_argument('--log-delay', type=float, default=0.0, help='Seconds the stub logging service sleeps per call')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='Unmeasured seconds before measuring')
+    parser.add_argument('--requests', type=int, default=0, help='Stop after this many requests (0: no limit)')
+    parser.add_argument('--seed-users', type=int, default=1000, help='Users to create before the run')
+    parser.add_argument('--bulk-size', type=int, default=100, help='Items per bulk request')
+    parser.add_argument('--output', default='bench-results.json')
+    parser.add_argument('--compare', metavar='FILE', help='Earlier result file to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.15,
+                        help='Allowed fractional p95 increase or req/s drop before --compare fails')
+    args = parser.parse_args()
+
+    state = RunState(args.bulk_size)
+    processes = []
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            if args.target:
+                base_url = args.target.rstrip('/')
+            else:
+                base_url, processes = start_stack(args, workdir)
+            if args.seed_users:
+                seed(base_url, state, args.seed_users)
+            source = replayed_requests(args.replay) if args.replay else synthetic_requests(args.mix, state)
+            endpoints, overall, elapsed = run_load(
+                base_url, source, state, args.concurrency, args.duration, args.warmup, args.requests)
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait()
+
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "mix": None if args.replay else args.mix,
+            "replay": args.replay,
+            "target": args.target or ('gunicorn' if args.workers else 'dev-server'),
+            "database": 'custom' if args.database_url else 'sqlite',
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration_s": round(elapsed, 2),
+            "env": args.env,
+            "log_delay_s": args.log_delay,
+            "python": platform.python_version(),
+        },
+        "overall": overall,
+        "endpoints": endpoints,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    print_report(result)
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(result, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Minimal stand-in for the logging service used by the benchmark harness.
+
+Accepts ``POST /logs`` and ``POST /logs/batch`` and discards the body,
+optionally sleeping first to simulate a slow logging service.
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(delay):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            if delay:
+                time.sleep(delay)
+            body = json.dumps({"status": "logged"}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=5901)
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to sleep before answering')
+    args = parser.parse_args()
+    ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(args.delay)).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
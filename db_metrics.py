@@ -0,0 +1,85 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from prometheus_client import Gauge, Histogram
+
+# Prometheus metrics
+DB_POOL_SIZE = Gauge('db_pool_size', 'Configured connection pool size', multiprocess_mode='livesum')
+DB_POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out', 'Connections currently checked out of the pool', multiprocess_mode='livesum'
+)
+DB_POOL_OVERFLOW = Gauge(
+    'db_pool_overflow', 'Connections open beyond pool_size (negative while the pool is filling)',
+    multiprocess_mode='livesum'
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time to get a connection from the pool, including opening one when the pool grows',
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+)
+DB_QUERY_DURATION = Histogram(
+    'db_query_duration_seconds', 'Database statement latency', ['statement'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+STATEMENT_TYPES = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout time and keeps the pool gauges current.
+
+    SQLAlchemy has no event that fires before a checkout starts, so the wait
+    is timed around ``_do_get``, which blocks while the pool is exhausted and
+    also opens new connections while it can still grow. The gauges are set
+    after ``_do_get`` and ``_do_return_conn`` rather than from pool events,
+    because ``checkin`` fires before the connection is actually back in the
+    pool (or, for an overflow connection, closed).
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+            self._update_gauges()
+
+    def _do_return_conn(self, record):
+        try:
+            super()._do_return_conn(record)
+        finally:
+            self._update_gauges()
+
+    def _update_gauges(self):
+        DB_POOL_CHECKED_OUT.set(self.checkedout())
+        DB_POOL_OVERFLOW.set(self.overflow())
+
+
+def _statement_type(statement):
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+    return keyword if keyword in STATEMENT_TYPES else 'OTHER'
+
+
+def instrument_engine(engine):
+    """Attach pool gauges and per-statement latency to ``engine``."""
+    if isinstance(engine.pool, QueuePool):
+        # engine.dispose() recreates the pool with the same size and class, so
+        # an InstrumentedQueuePool keeps updating the other gauges itself
+        DB_POOL_SIZE.set(engine.pool.size())
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info['query_start'].pop()
+        DB_QUERY_DURATION.labels(statement=_statement_type(statement)).observe(time.perf_counter() - start)
+
+    @event.listens_for(engine, 'handle_error')
+    def discard_timer(context):
+        # after_cursor_execute never fires for a failed statement
+        starts = context.connection.info.get('query_start') if context.connection is not None else None
+        if starts:
+            starts.pop()
@@ -0,0 +1,23 @@
+import glob
+import os
+
+# Workers write their metrics here so /metrics can aggregate every process.
+# prometheus_client picks its storage when first imported, so this has to be
+# set before the import below and before workers load the app.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus-multiproc')
+
+from prometheus_client import multiprocess  # noqa: E402
+
+
+def on_starting(server):
+    # Samples left over from a previous run would be summed into the new one.
+    # Only remove prometheus_client's own *.db files: the directory may be an
+    # operator-supplied path shared with other things.
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(path, exist_ok=True)
+    for stale in glob.glob(os.path.join(path, '*.db')):
+        os.remove(stale)
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
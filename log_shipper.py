@@ -0,0 +1,193 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from prometheus_client import Counter, Gauge
+
+# Prometheus metrics
+LOG_EVENTS_QUEUED = Counter('log_events_queued_total', 'Log events accepted into the shipper queue')
+LOG_EVENTS_SENT = Counter('log_events_sent_total', 'Log events delivered to the logging service')
+LOG_EVENTS_DROPPED = Counter('log_events_dropped_total', 'Log events dropped before delivery', ['reason'])
+LOG_SEND_RETRIES = Counter('log_send_retries_total', 'Batches resent after the logging service answered 503')
+LOG_QUEUE_DEPTH = Gauge(
+    'log_events_queue_depth', 'Log events waiting in the shipper queue', multiprocess_mode='livesum'
+)
+
+QUEUE_POLICIES = ('drop', 'drop_oldest', 'block')
+
+
+class LogShipper:
+    """Ships log events to the logging service from a background thread.
+
+    Events are buffered in a bounded queue and POSTed in batches to
+    ``<url>/logs/batch`` once ``batch_size`` events are waiting or the oldest
+    one is ``flush_interval`` seconds old. When the queue is full the
+    ``policy`` decides what happens: ``drop`` discards the new event,
+    ``drop_oldest`` evicts the oldest queued event, ``block`` waits up to
+    ``block_timeout`` seconds for room before dropping.
+
+    A ``503`` means the logging service rejected the whole batch, so it is
+    resent up to ``max_retries`` times, waiting for ``Retry-After`` or an
+    exponential backoff capped at ``max_backoff`` seconds. Events keep
+    queueing meanwhile, so sustained backpressure ends in the queue policy.
+    """
+
+    def __init__(self, url, max_queue=10000, batch_size=100, flush_interval=1.0,
+                 policy='drop', block_timeout=0.05, timeout=2, max_retries=5, max_backoff=30):
+        if policy not in QUEUE_POLICIES:
+            raise ValueError(f"Unsupported log queue policy '{policy}', expected one of {', '.join(QUEUE_POLICIES)}")
+        self.url = url.rstrip('/') + '/logs/batch'
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._stop = None
+        self._thread = None
+        self._session = None
+
+    def _ensure_started(self):
+        # Gunicorn forks workers after app import, so the queue, thread and
+        # session are created lazily once per process.
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._stop = threading.Event()
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+            self._thread = threading.Thread(target=self._run, name='log-shipper', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, payload):
+        """Queue an event for delivery without blocking the caller (except under ``block``)."""
+        self._ensure_started()
+        if self._stop.is_set():
+            LOG_EVENTS_DROPPED.labels(reason='shutdown').inc()
+            return False
+        try:
+            if self.policy == 'block':
+                self._queue.put(payload, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(payload)
+        except queue.Full:
+            if self.policy != 'drop_oldest':
+                LOG_EVENTS_DROPPED.labels(reason='queue_full').inc()
+                return False
+            try:
+                self._queue.get_nowait()
+                LOG_EVENTS_DROPPED.labels(reason='queue_full').inc()
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(payload)
+            except queue.Full:
+                LOG_EVENTS_DROPPED.labels(reason='queue_full').inc()
+                return False
+        LOG_EVENTS_QUEUED.inc()
+        LOG_QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    def _collect(self):
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            if deadline is None:
+                timeout = self.flush_interval
+            else:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch
+
+    def _retry_delay(self, response, attempt):
+        try:
+            delay = float(response.headers.get('Retry-After', ''))
+        except ValueError:
+            delay = 2 ** attempt * 0.5
+        return min(delay, self.max_backoff)
+
+    def _send(self, batch):
+        attempt = 0
+        try:
+            while True:
+                response = self._session.post(self.url, json=batch, timeout=self.timeout)
+                # No retries while shutting down, the drain has to finish
+                if response.status_code != 503 or attempt >= self.max_retries or self._stop.is_set():
+                    break
+                attempt += 1
+                LOG_SEND_RETRIES.inc()
+                self._stop.wait(self._retry_delay(response, attempt))
+            response.raise_for_status()
+            LOG_EVENTS_SENT.inc(len(batch))
+        except requests.RequestException as e:
+            logging.error(f"Failed to send {len(batch)} log events to logging service: {str(e)}")
+            LOG_EVENTS_DROPPED.labels(reason='send_failed').inc(len(batch))
+        except Exception as e:
+            # e.g. an event that can't be JSON-encoded. Lose this batch, not the shipper thread.
+            logging.exception(f"Unexpected error sending {len(batch)} log events: {str(e)}")
+            LOG_EVENTS_DROPPED.labels(reason='error').inc(len(batch))
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            LOG_QUEUE_DEPTH.set(self._queue.qsize())
+            if batch:
+                self._send(batch)
+        self._drain()
+
+    def _drain(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._send(batch)
+                batch = []
+        if batch:
+            self._send(batch)
+        LOG_QUEUE_DEPTH.set(0)
+
+    def close(self, timeout=5):
+        """Stop accepting events and flush whatever is still queued."""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+def shipper_from_env():
+    shipper = LogShipper(
+        os.getenv('LOGGING_SERVICE_URL', 'http://logging-service:5001'),
+        max_queue=int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+        batch_size=int(os.getenv('LOG_BATCH_SIZE', '100')),
+        flush_interval=float(os.getenv('LOG_FLUSH_INTERVAL', '1.0')),
+        policy=os.getenv('LOG_QUEUE_POLICY', 'drop'),
+        max_retries=int(os.getenv('LOG_SEND_RETRIES', '5')),
+    )
+    atexit.register(shipper.close)
+    return shipper
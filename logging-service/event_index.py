@@ -0,0 +1,203 @@
+import base64
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from prometheus_client import Counter, Histogram
+
+# Prometheus metrics
+QUERY_SECONDS = Histogram(
+    'log_query_seconds', 'Time to answer one GET /logs page',
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+PRUNED = Counter('log_index_pruned_events_total', 'Events removed from the index with their expired segment')
+
+PRUNE_BATCH = 10000
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY,
+        ts TEXT NOT NULL,
+        event TEXT,
+        user_id INTEGER,
+        body TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_events_ts ON events (ts, id)",
+    "CREATE INDEX IF NOT EXISTS ix_events_user_ts ON events (user_id, ts, id)",
+    "CREATE INDEX IF NOT EXISTS ix_events_event_ts ON events (event, ts, id)",
+    # Rotated log segments and the last event id written to each
+    """CREATE TABLE IF NOT EXISTS segments (
+        name TEXT PRIMARY KEY,
+        last_id INTEGER NOT NULL
+    )""",
+)
+
+
+def normalize_ts(value):
+    """Parse an ISO-8601 timestamp into a fixed-width naive UTC string that sorts lexically."""
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime('%Y-%m-%dT%H:%M:%S.%f')
+
+
+def encode_cursor(ts, event_id):
+    return base64.urlsafe_b64encode(f"{ts}|{event_id}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        ts, event_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return ts, int(event_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+class EventIndex:
+    """Sidecar SQLite store of written events, indexed by time, user_id and event type.
+
+    ``add`` and ``rotate`` are called from the writer thread, which owns the
+    only write connection. The database runs in WAL mode so request threads
+    can query through their own read-only connections while batches are
+    inserted. Only events from the active log file and the newest
+    ``retain_segments`` rotated segments are kept (0 keeps everything), so
+    the index stays bounded as the log rotates.
+    """
+
+    def __init__(self, path, retain_segments=10):
+        self.path = path
+        self.retain_segments = retain_segments
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self, readonly=False):
+        if readonly:
+            return sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _event_ts(record, indexed_at):
+        # Clients may send any timestamp or received_at (the writer only sets
+        # received_at if it is missing), so fall back per record and end with
+        # the time of indexing, which only the server controls
+        for key in ('timestamp', 'received_at'):
+            value = record.get(key)
+            if value:
+                try:
+                    return normalize_ts(str(value))
+                except ValueError:
+                    pass
+        return indexed_at
+
+    def add(self, records, lines):
+        """Index ``records`` alongside their already serialized JSON ``lines``."""
+        indexed_at = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%f')
+        rows = []
+        for record, line in zip(records, lines):
+            ts = self._event_ts(record, indexed_at)
+            user_id = record.get('user_id')
+            rows.append((
+                ts,
+                record.get('event'),
+                user_id if isinstance(user_id, int) else None,
+                line,
+            ))
+        conn = self._writer_connection()
+        with conn:
+            conn.executemany("INSERT INTO events (ts, event, user_id, body) VALUES (?, ?, ?, ?)", rows)
+
+    def rotate(self, segment):
+        """Assign everything indexed so far to the rotated ``segment`` and prune expired segments."""
+        conn = self._writer_connection()
+        with conn:
+            last_id = conn.execute("SELECT MAX(id) FROM events").fetchone()[0] or 0
+            conn.execute("INSERT OR REPLACE INTO segments (name, last_id) VALUES (?, ?)",
+                         (os.path.basename(segment), last_id))
+            if not self.retain_segments:
+                return
+            expired = conn.execute(
+                "SELECT name, last_id FROM segments ORDER BY last_id DESC LIMIT -1 OFFSET ?",
+                (self.retain_segments,)
+            ).fetchall()
+        if not expired:
+            return
+        cutoff = max(last_id for _, last_id in expired)
+        # Delete in small transactions so the WAL stays small; freed pages are
+        # reused by later inserts
+        while True:
+            with conn:
+                deleted = conn.execute(
+                    "DELETE FROM events WHERE id IN (SELECT id FROM events WHERE id <= ? LIMIT ?)",
+                    (cutoff, PRUNE_BATCH)
+                ).rowcount
+            PRUNED.inc(deleted)
+            if deleted < PRUNE_BATCH:
+                break
+        with conn:
+            conn.executemany("DELETE FROM segments WHERE name = ?", [(name,) for name, _ in expired])
+
+    def _writer_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def query(self, event=None, user_id=None, since=None, until=None, cursor=None, limit=100, order='desc'):
+        """Return ``(bodies, next_cursor)`` for one page of matching events.
+
+        Each filter narrows one of the composite indexes, and pages continue
+        from the ``(ts, id)`` of the previous page's last row, so every page
+        is an index range scan however deep into the results it is.
+        """
+        clauses, params = [], []
+        if event is not None:
+            clauses.append("event = ?")
+            params.append(event)
+        if user_id is not None:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(normalize_ts(since))
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(normalize_ts(until))
+        direction, comparison = ('DESC', '<') if order == 'desc' else ('ASC', '>')
+        if cursor:
+            clauses.append(f"(ts, id) {comparison} (?, ?)")
+            params.extend(decode_cursor(cursor))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        sql = (f"SELECT id, ts, body FROM events {where} "
+               f"ORDER BY ts {direction}, id {direction} LIMIT ?")
+        params.append(limit + 1)
+
+        with QUERY_SECONDS.time():
+            conn = self._connect(readonly=True)
+            try:
+                rows = conn.execute(sql, params).fetchall()
+            finally:
+                conn.close()
+        page = rows[:limit]
+        next_cursor = encode_cursor(page[-1][1], page[-1][0]) if len(rows) > limit else None
+        return [body for _, _, body in page], next_cursor
+
+
+def index_from_env():
+    path = os.getenv('LOG_INDEX_PATH', 'crud-logs.index.sqlite')
+    if not path:
+        return None
+    try:
+        return EventIndex(path, retain_segments=int(os.getenv('LOG_INDEX_SEGMENTS', '10')))
+    except sqlite3.Error as e:
+        logging.error(f"Event index disabled, failed to open {path}: {str(e)}")
+        return None
@@ -0,0 +1,198 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from datetime import datetime
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Prometheus metrics
+INGESTED = Counter('log_ingest_events_total', 'Events accepted for writing')
+REJECTED = Counter('log_ingest_rejected_total', 'Events rejected because the write queue was full')
+QUEUE_DEPTH = Gauge('log_writer_queue_depth', 'Events waiting to be written')
+FLUSH_SECONDS = Histogram(
+    'log_writer_flush_seconds', 'Time to write and flush one batch of events',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+)
+FLUSHED = Counter('log_writer_events_written_total', 'Events written to disk')
+ROTATIONS = Counter('log_writer_rotations_total', 'Log segment rotations')
+
+
+class EventWriter:
+    """Appends events as JSON lines from a single writer thread.
+
+    Events are queued by ``submit`` and written in batches of up to
+    ``batch_size`` at least every ``flush_interval`` seconds. The active file
+    is rotated once it exceeds ``max_bytes`` or is older than
+    ``max_age`` seconds (0 disables either limit). Rotated segments are
+    renamed with a UTC timestamp suffix and optionally gzipped in the
+    background. If an ``index`` is given, every written batch is also added
+    to it from the writer thread, and it is told about every rotation so it
+    can drop events from expired segments.
+    """
+
+    def __init__(self, path, max_queue=100000, batch_size=1000, flush_interval=0.5,
+                 max_bytes=100 * 1024 * 1024, max_age=0, compress=True, fsync=False, index=None):
+        self.path = path
+        self.index = index
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._stop = None
+        self._thread = None
+        self._file = None
+        self._opened_at = None
+
+    def _ensure_started(self):
+        # Started lazily so the thread lives in the serving process, not a pre-fork parent
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self.max_queue)
+            self._stop = threading.Event()
+            self._open()
+            self._thread = threading.Thread(target=self._run, name='event-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, events):
+        """Queue all of ``events`` for writing, or none of them if they don't fit.
+
+        Returns False when the batch was rejected, so a client can retry it
+        without writing any event twice.
+        """
+        self._ensure_started()
+        received_at = datetime.utcnow().isoformat()
+        records = []
+        for event in events:
+            record = dict(event) if isinstance(event, dict) else {"data": event}
+            record.setdefault("received_at", received_at)
+            records.append(record)
+        # Only submitters add to the queue, so once the free space has been
+        # checked under this lock every put below succeeds
+        with self._submit_lock:
+            if self.max_queue - self._queue.qsize() < len(records):
+                REJECTED.inc(len(records))
+                return False
+            for record in records:
+                self._queue.put_nowait(record)
+        INGESTED.inc(len(records))
+        QUEUE_DEPTH.set(self._queue.qsize())
+        return True
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=1024 * 1024)
+        self._opened_at = time.time()
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        start = time.perf_counter()
+        lines = [json.dumps(record, separators=(',', ':'), default=str) for record in batch]
+        self._file.write('\n'.join(lines) + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        FLUSH_SECONDS.observe(time.perf_counter() - start)
+        FLUSHED.inc(len(batch))
+        if self.index is not None:
+            try:
+                self.index.add(batch, lines)
+            except Exception as e:
+                # The events are already on disk, only their queryability is lost
+                logging.error(f"Failed to index {len(batch)} events: {str(e)}")
+
+    def _should_rotate(self):
+        if self.max_bytes and self._file.tell() >= self.max_bytes:
+            return True
+        return bool(self.max_age) and time.time() - self._opened_at >= self.max_age
+
+    def _rotate(self):
+        self._file.close()
+        if os.path.getsize(self.path) == 0:
+            self._open()
+            return
+        segment = f"{self.path}.{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}"
+        os.rename(self.path, segment)
+        self._open()
+        ROTATIONS.inc()
+        if self.index is not None:
+            try:
+                self.index.rotate(segment)
+            except Exception as e:
+                logging.error(f"Failed to prune the event index after rotating {segment}: {str(e)}")
+        if self.compress:
+            threading.Thread(target=self._compress, args=(segment,), daemon=True).start()
+
+    @staticmethod
+    def _compress(segment):
+        try:
+            with open(segment, 'rb') as source, gzip.open(segment + '.gz.tmp', 'wb') as target:
+                shutil.copyfileobj(source, target)
+            os.rename(segment + '.gz.tmp', segment + '.gz')
+            os.remove(segment)
+        except OSError as e:
+            logging.error(f"Failed to compress {segment}: {str(e)}")
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._collect()
+            QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                if batch:
+                    self._write(batch)
+                if self._should_rotate():
+                    self._rotate()
+            except OSError as e:
+                logging.error(f"Failed to write {len(batch)} events: {str(e)}")
+        self._file.close()
+
+    def close(self, timeout=10):
+        """Write everything still queued and close the file."""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+
+
+def writer_from_env(index=None):
+    writer = EventWriter(
+        os.getenv('LOG_FILE', 'crud-logs.log'),
+        max_queue=int(os.getenv('LOG_WRITER_QUEUE_SIZE', '100000')),
+        batch_size=int(os.getenv('LOG_WRITER_BATCH_SIZE', '1000')),
+        flush_interval=float(os.getenv('LOG_WRITER_FLUSH_INTERVAL', '0.5')),
+        max_bytes=int(os.getenv('LOG_ROTATE_BYTES', str(100 * 1024 * 1024))),
+        max_age=int(os.getenv('LOG_ROTATE_SECONDS', '0')),
+        compress=os.getenv('LOG_COMPRESS', 'true').lower() == 'true',
+        fsync=os.getenv('LOG_FSYNC', 'false').lower() == 'true',
+        index=index,
+    )
+    atexit.register(writer.close)
+    return writer
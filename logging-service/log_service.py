@@ -1,17 +1,64 @@
-from flask import Flask, request
+from flask import Flask, request, Response
 from prometheus_flask_exporter import PrometheusMetrics
 import logging
-from datetime import datetime
+from event_writer import writer_from_env
+from event_index import index_from_env
 
 app = Flask(__name__)
 metrics = PrometheusMetrics(app)
-logging.basicConfig(filename='crud-logs.log', level=logging.INFO)
+logging.basicConfig(level=logging.INFO)
+
+# Events are appended as JSON lines by a background writer thread and
+# indexed in a sidecar SQLite database for GET /logs
+index = index_from_env()
+writer = writer_from_env(index)
+
+def ingest(events):
+    # A batch is queued whole or not at all, so a 503 is always safe to retry
+    if len(events) > writer.max_queue:
+        return {"error": f"Batch exceeds the log queue size of {writer.max_queue} events"}, 413
+    if not writer.submit(events):
+        return {"error": "Log queue is full"}, 503, {"Retry-After": "1"}
+    return {"status": "logged", "count": len(events)}, 200
 
 @app.route('/logs', methods=['POST'])
 def log_event():
-    data = request.json
-    logging.info(f"{datetime.utcnow()} - {data}")
-    return {"status": "logged"}, 200
+    data = request.get_json(silent=True)
+    if data is None:
+        return {"error": "Expected a JSON body"}, 400
+    return ingest([data])
+
+@app.route('/logs/batch', methods=['POST'])
+def log_batch():
+    events = request.get_json(silent=True)
+    if not isinstance(events, list):
+        return {"error": "Expected a JSON array of events"}, 400
+    return ingest(events)
+
+@app.route('/logs', methods=['GET'])
+def query_logs():
+    if index is None:
+        return {"error": "Event index is disabled"}, 503
+    args = request.args
+    order = args.get('order', 'desc')
+    if order not in ('asc', 'desc'):
+        return {"error": "order must be 'asc' or 'desc'"}, 400
+    try:
+        user_id = int(args['user_id']) if 'user_id' in args else None
+        limit = max(1, min(int(args.get('limit', 100)), 1000))
+        events, next_cursor = index.query(
+            event=args.get('event'),
+            user_id=user_id,
+            since=args.get('since'),
+            until=args.get('until'),
+            cursor=args.get('cursor'),
+            limit=limit,
+            order=order,
+        )
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return Response((event + '\n' for event in events), mimetype='application/x-ndjson', headers=headers)
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5001)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=5001)
@@ -0,0 +1,108 @@
+import collections
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+from prometheus_client import Counter
+
+# Prometheus metrics
+PROFILES_CAPTURED = Counter('profiles_captured_total', 'Request stack profiles written to disk', ['route'])
+
+
+class SamplingProfiler:
+    """Samples the stacks of in-flight request threads from one background thread.
+
+    ``start`` registers the calling thread and ``stop`` returns how often each
+    stack was seen while it was registered. Profiles are written in the
+    collapsed ``frame;frame;frame count`` format that flamegraph.pl and
+    speedscope read directly.
+    """
+
+    def __init__(self, output_dir, interval=0.005, threshold_ms=0):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    def _ensure_started(self):
+        # One sampler thread per gunicorn worker, started after the fork
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._active = {}
+            threading.Thread(target=self._run, name='sampling-profiler', daemon=True).start()
+            self._pid = os.getpid()
+
+    def start(self):
+        self._ensure_started()
+        with self._lock:
+            self._active[threading.get_ident()] = collections.Counter()
+        self._wake.set()
+
+    def stop(self):
+        with self._lock:
+            return self._active.pop(threading.get_ident(), collections.Counter())
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while True:
+            # Clear before checking: a start() landing after the check sets
+            # the event again, so wait() returns instead of missing it
+            self._wake.clear()
+            with self._lock:
+                idle = not self._active
+            if idle:
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, stacks in self._active.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None and thread_id != own_id:
+                        stacks[self._fold(frame)] += 1
+            time.sleep(self.interval)
+
+    @staticmethod
+    def _fold(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+    def dump(self, stacks, method, route, duration_ms):
+        """Write ``stacks`` to the output directory and return the file path."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root'
+        name = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}_{method}_{slug}_{int(duration_ms)}ms_{os.getpid()}.folded"
+        path = os.path.join(self.output_dir, name)
+        try:
+            with open(path, 'w') as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        except OSError as e:
+            logging.error(f"Failed to write profile {path}: {str(e)}")
+            return None
+        PROFILES_CAPTURED.labels(route=route).inc()
+        return path
+
+
+def profiler_from_env():
+    threshold_ms = float(os.getenv('PROFILE_SLOW_MS', '0'))
+    token = os.getenv('PROFILE_TOKEN', '')
+    if not threshold_ms and not token:
+        return None
+    return SamplingProfiler(
+        os.getenv('PROFILE_DIR', '/tmp/profiles'),
+        interval=float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000,
+        threshold_ms=threshold_ms,
+    )
@@ -13,7 +13,9 @@ done
 
 # Initialize the database
 echo "Initializing database..."
-python -c "from app import db, initialize_database; initialize_database()"
+# Creates missing tables and indexes once, before any worker starts, so slow
+# concurrent index builds on a large table never race gunicorn's timeout
+flask --app app migrate-db
 
 echo "Database is ready, starting Gunicorn..."
-exec gunicorn -w 4 -b 0.0.0.0:5000 app:app --timeout 120 --access-logfile -
\ No newline at end of file
+exec gunicorn -c gunicorn.conf.py -w "${GUNICORN_WORKERS:-4}" -b 0.0.0.0:5000 app:app --timeout 120 --access-logfile -
\ No newline at end of file
@@ -3,10 +3,36 @@ document.addEventListener('DOMContentLoaded', function() {
     const resetFormButton = document.getElementById('resetForm');
     const usersTableBody = document.getElementById('usersTableBody');
     const loadingIndicator = document.getElementById('loadingIndicator');
+    const loadMoreButton = document.getElementById('loadMoreUsers');
+    const filterForm = document.getElementById('userFilters');
+    const searchInput = document.getElementById('searchQuery');
+    const pageSize = 50;
+    let nextCursor = null;
+    let loading = false;
+    let searchTimer = null;
+    let reloadPending = false;
 
     // Load users on page load
     loadUsers();
 
+    // Fetch the next page when the "Load more" button scrolls into view
+    loadMoreButton.addEventListener('click', () => loadUsers(nextCursor));
+    if ('IntersectionObserver' in window) {
+        new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting) && nextCursor && !loading) {
+                loadUsers(nextCursor);
+            }
+        }).observe(loadMoreButton);
+    }
+
+    // Filtering and sorting run on the server; any change reloads from the first page
+    filterForm.addEventListener('submit', e => e.preventDefault());
+    filterForm.addEventListener('change', () => loadUsers());
+    searchInput.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => loadUsers(), 300);
+    });
+
     // Form submission handler
     userForm.addEventListener('submit', async function(e) {
         e.preventDefault();
@@ -35,16 +61,50 @@ document.addEventListener('DOMContentLoaded', function() {
     resetFormButton.addEventListener('click', resetForm);
 
     // API Functions
-    async function loadUsers() {
+    // Pass a cursor to append the next page, or nothing to reload from the top
+    async function loadUsers(cursor = null) {
+        if (loading) {
+            // Don't lose a filter change that arrives mid-request
+            if (!cursor) reloadPending = true;
+            return;
+        }
+        loading = true;
         showLoading(true);
         try {
-            const response = await fetch('/users');
+            const params = filterParams();
+            params.set('limit', pageSize);
+            if (cursor) params.set('cursor', cursor);
+            const response = await fetch(`/users?${params}`);
+            if (!response.ok) throw new Error('Failed to load users');
             const users = await response.json();
-            renderUsers(users);
+            nextCursor = response.headers.get('X-Next-Cursor');
+            renderUsers(users, Boolean(cursor));
+            loadMoreButton.classList.toggle('d-none', !nextCursor);
         } catch (error) {
             showToast('Failed to load users', 'error');
         }
         showLoading(false);
+        loading = false;
+        if (reloadPending) {
+            reloadPending = false;
+            loadUsers();
+        }
+    }
+
+    function filterParams() {
+        const params = new URLSearchParams();
+        const q = searchInput.value.trim();
+        if (q) {
+            params.set('q', q);
+            params.set('match', document.getElementById('searchMatch').value);
+        }
+        const createdAfter = document.getElementById('createdAfter').value;
+        if (createdAfter) params.set('created_after', createdAfter);
+        const createdBefore = document.getElementById('createdBefore').value;
+        if (createdBefore) params.set('created_before', createdBefore);
+        const sort = document.getElementById('sortUsers').value;
+        if (sort) params.set('sort', sort);
+        return params;
     }
 
     async function createUser(userData) {
@@ -75,8 +135,8 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // UI Functions
-    function renderUsers(users) {
-        usersTableBody.innerHTML = users.map(user => `
+    function renderUsers(users, append) {
+        const rows = users.map(user => `
             <tr>
                 <td>${escapeHtml(user.name)}</td>
                 <td>${escapeHtml(user.email)}</td>
@@ -91,6 +151,11 @@ document.addEventListener('DOMContentLoaded', function() {
                 </td>
             </tr>
         `).join('');
+        if (append) {
+            usersTableBody.insertAdjacentHTML('beforeend', rows);
+        } else {
+            usersTableBody.innerHTML = rows;
+        }
     }
 
     function showLoading(show) {
@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pytest
+
+# app.py reads its configuration and connects to the database at import time,
+# so point it at a throwaway SQLite file and the in-memory cache store first.
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ['CACHE_STORE_URL'] = 'memory'
+os.environ['LOGGING_SERVICE_URL'] = 'http://127.0.0.1:9'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app_module.log_shipper, 'submit', lambda payload: True)
+    with app_module.app.app_context():
+        app_module.User.query.delete()
+        app_module.db.session.commit()
+    app_module.invalidate_user_cache()
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def add_users():
+    """Insert ``(name, email, created_at)`` rows directly and return their ids."""
+    def add(*rows):
+        with app_module.app.app_context():
+            users = [
+                app_module.User(name=name, email=email, created_at=created_at or datetime.utcnow())
+                for name, email, created_at in rows
+            ]
+            app_module.db.session.add_all(users)
+            app_module.db.session.commit()
+            return [user.id for user in users]
+    return add
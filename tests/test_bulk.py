@@ -0,0 +1,85 @@
+import json
+
+import app as app_module
+
+
+def names(client):
+    return sorted(u['name'] for u in client.get('/users?limit=500').json)
+
+
+def test_bulk_create_reports_each_item(client, add_users):
+    add_users(('existing', 'taken@example.com', None))
+    response = client.post('/users/bulk', json=[
+        {"name": "a", "email": "a@example.com"},
+        {"name": "missing email"},
+        {"name": "dup", "email": "a@example.com"},
+        {"name": "clash", "email": "taken@example.com"},
+    ])
+    assert response.status_code == 207
+    statuses = [r['status'] for r in response.json['results']]
+    assert statuses == ['created', 'error', 'error', 'skipped']
+    assert response.json['summary'] == {"created": 1, "error": 2, "skipped": 1, "received": 4}
+    assert names(client) == ['a', 'existing']
+
+
+def test_bulk_create_upsert(client, add_users):
+    add_users(('old', 'taken@example.com', None))
+    response = client.post('/users/bulk?on_conflict=update', json=[{"name": "new", "email": "taken@example.com"}])
+    assert response.status_code == 200
+    assert response.json['results'][0]['status'] == 'upserted'
+    assert names(client) == ['new']
+
+
+def test_bulk_create_accepts_ndjson(client):
+    body = '\n'.join(json.dumps({"name": n, "email": f"{n}@example.com"}) for n in ('a', 'b')) + '\n'
+    response = client.post('/users/bulk', data=body, content_type='application/x-ndjson')
+    assert response.json['summary'] == {"created": 2, "received": 2}
+
+
+def test_failed_chunk_is_replayed_per_item(client, add_users, caplog):
+    first, second, third = add_users(
+        ('one', 'one@example.com', None),
+        ('two', 'two@example.com', None),
+        ('three', 'three@example.com', None),
+    )
+    # The unique email clash fails the whole executemany for the chunk; the
+    # savepoint replay must still apply the other rows of that chunk
+    response = client.patch('/users/bulk?chunk_size=3', json=[
+        {"id": first, "name": "uno"},
+        {"id": second, "email": "three@example.com"},
+        {"id": third, "name": "tres"},
+        {"id": 999999, "name": "ghost"},
+    ])
+    assert response.status_code == 207
+    assert 'retrying per item' in caplog.text
+    results = response.json['results']
+    assert [r['status'] for r in results] == ['updated', 'error', 'updated', 'error']
+    assert results[3]['error'] == 'User not found'
+    assert names(client) == ['tres', 'two', 'uno']
+
+
+def test_bulk_delete_mixes_found_and_missing(client, add_users):
+    first, second = add_users(('one', 'one@example.com', None), ('two', 'two@example.com', None))
+    response = client.delete('/users/bulk', json=[first, {"id": 999999}, "nope"])
+    assert [r['status'] for r in response.json['results']] == ['deleted', 'error', 'error']
+    assert names(client) == ['two']
+
+
+def test_bulk_rejects_bodies_that_are_not_lists(client):
+    assert client.post('/users/bulk', json={"name": "a"}).status_code == 400
+    assert client.post('/users/bulk', data='{"name": "a"}\nnot json', content_type='application/x-ndjson').status_code == 400
+
+
+def test_bulk_item_limit(client, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'BULK_MAX_ITEMS', 2)
+    assert client.delete('/users/bulk', json=[1, 2, 3]).status_code == 400
+
+
+def test_boolean_ids_are_rejected(client, add_users):
+    first, = add_users(('one', 'one@example.com', None))
+    # true == 1, so it must not be taken as a user id
+    response = client.patch('/users/bulk', json=[{"id": True, "name": "renamed"}, {"id": False, "name": "x"}])
+    assert [r['status'] for r in response.json['results']] == ['error', 'error']
+    response = client.delete('/users/bulk', json=[True, {"id": True}, False])
+    assert [r['status'] for r in response.json['results']] == ['error', 'error', 'error']
+    assert names(client) == ['one']
@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as app_module
+from user_cache import LRUCache, MemoryStore, ResponseCache
+
+
+def test_lru_evicts_least_recently_used():
+    evictions = []
+    cache = LRUCache(maxsize=2, ttl=30, on_evict=evictions.append)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert evictions == ['capacity']
+
+
+def test_invalidate_bumps_shared_generation():
+    store = MemoryStore()
+    first, second = ResponseCache(store=store), ResponseCache(store=store)
+    before = first.generation()[0]
+    first.set(f"{before}:/users", {"body": "old"})
+    assert second.get(f"{before}:/users") == ({"body": "old"}, 'shared')
+
+    first.invalidate()
+    # Another process sharing the store moves to the new generation at once,
+    # so the old entry is no longer looked up
+    after = second.generation()[0]
+    assert after != before
+    assert second.get(f"{after}:/users") == (None, None)
+
+
+def test_cached_list_served_until_a_write(client, add_users):
+    add_users(('alice', 'alice@example.com', None))
+    first = client.get('/users')
+    assert [u['name'] for u in first.json] == ['alice']
+    assert app_module.user_cache.get(f"{app_module.user_cache.generation()[0]}::/users?")[1] == 'local'
+
+    client.post('/users', json={"name": "bob", "email": "bob@example.com"})
+    second = client.get('/users')
+    assert sorted(u['name'] for u in second.json) == ['alice', 'bob']
+    assert second.headers['ETag'] != first.headers['ETag']
+
+
+def test_not_modified_only_for_current_etag(client, add_users):
+    [user_id] = add_users(('alice', 'alice@example.com', None))
+    response = client.get(f'/users/{user_id}')
+    etag = response.headers['ETag']
+
+    assert client.get(f'/users/{user_id}', headers={'If-None-Match': etag}).status_code == 304
+
+    client.patch('/users/bulk', json=[{"id": user_id, "name": "alicia"}])
+    stale = client.get(f'/users/{user_id}', headers={'If-None-Match': etag})
+    assert stale.status_code == 200
+    assert stale.json['name'] == 'alicia'
+
+
+@pytest.mark.parametrize('method', ['post', 'put', 'delete'])
+def test_single_user_writes_invalidate(client, add_users, method):
+    [user_id] = add_users(('alice', 'alice@example.com', None))
+    etag = client.get('/users').headers['ETag']
+    if method == 'post':
+        client.post('/users', json={"name": "bob", "email": "bob@example.com"})
+    elif method == 'put':
+        client.put(f'/users/{user_id}', json={"name": "alicia"})
+    else:
+        client.delete(f'/users/{user_id}')
+    assert client.get('/users', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_if_modified_since_never_yields_304(client, add_users):
+    add_users(('alice', 'alice@example.com', None))
+    last_modified = client.get('/users').headers['Last-Modified']
+    assert client.get('/users', headers={'If-Modified-Since': last_modified}).status_code == 200
+
+
+def test_dashboard_etag_expires_with_the_clock(client, add_users, monkeypatch):
+    add_users(('alice', 'alice@example.com', None))
+    now = datetime.utcnow()
+
+    class Clock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now
+
+    monkeypatch.setattr(app_module, 'datetime', Clock)
+    etag = client.get('/dashboard').headers['ETag']
+    assert client.get('/dashboard', headers={'If-None-Match': etag}).status_code == 304
+
+    # No write happened, but the last-24h and 7-day figures have moved on
+    now += timedelta(minutes=1)
+    assert client.get('/dashboard', headers={'If-None-Match': etag}).status_code == 200
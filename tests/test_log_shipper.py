@@ -0,0 +1,165 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from log_shipper import LOG_EVENTS_DROPPED, LOG_EVENTS_SENT, LOG_SEND_RETRIES, LogShipper
+
+
+class StubLoggingService:
+    """Records every batch POSTed to it. ``statuses`` are answered in order, then 200s.
+
+    Clearing ``open`` makes requests hang until it is set again, which keeps
+    the shipper thread busy so its queue fills up.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.statuses = []
+        self.open = threading.Event()
+        self.open.set()
+        self.received = threading.Event()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                batch = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.received.set()
+                stub.open.wait(5)
+                status = stub.statuses.pop(0) if stub.statuses else 200
+                if status == 200:
+                    stub.batches.append(batch)
+                self.send_response(status)
+                self.send_header('Retry-After', '0.01')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+
+    def events(self):
+        return [event['n'] for batch in self.batches for event in batch]
+
+
+@pytest.fixture
+def stub():
+    stub = StubLoggingService()
+    yield stub
+    stub.open.set()
+    stub.server.shutdown()
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def counter(metric, **labels):
+    return (metric.labels(**labels) if labels else metric)._value.get()
+
+
+def test_full_batches_are_sent_without_waiting(stub):
+    shipper = LogShipper(stub.url, batch_size=3, flush_interval=30)
+    for n in range(3):
+        shipper.submit({"n": n})
+    wait_for(lambda: stub.batches)
+    assert stub.batches == [[{"n": 0}, {"n": 1}, {"n": 2}]]
+
+
+def test_partial_batches_are_sent_after_the_flush_interval(stub):
+    shipper = LogShipper(stub.url, batch_size=100, flush_interval=0.1)
+    shipper.submit({"n": 0})
+    shipper.submit({"n": 1})
+    start = time.monotonic()
+    wait_for(lambda: stub.batches)
+    assert time.monotonic() - start >= 0.05
+    assert stub.events() == [0, 1]
+
+
+def stall(stub, shipper):
+    """Leave the shipper thread blocked on a request for event 0."""
+    stub.open.clear()
+    shipper.submit({"n": 0})
+    assert stub.received.wait(5)
+
+
+@pytest.mark.parametrize('policy, accepted, delivered', [
+    ('drop', [True, True, False], [0, 1, 2]),
+    ('drop_oldest', [True, True, True], [0, 2, 3]),
+    ('block', [True, True, False], [0, 1, 2]),
+])
+def test_queue_policies(stub, policy, accepted, delivered):
+    shipper = LogShipper(stub.url, max_queue=2, batch_size=1, flush_interval=0.01,
+                         policy=policy, block_timeout=0.05)
+    stall(stub, shipper)
+    dropped = counter(LOG_EVENTS_DROPPED, reason='queue_full')
+    assert [shipper.submit({"n": n}) for n in (1, 2, 3)] == accepted
+    assert counter(LOG_EVENTS_DROPPED, reason='queue_full') == dropped + 1
+    stub.open.set()
+    wait_for(lambda: len(stub.batches) == 3)
+    assert stub.events() == delivered
+
+
+def test_block_policy_waits_for_room(stub):
+    shipper = LogShipper(stub.url, max_queue=1, batch_size=1, flush_interval=0.01,
+                         policy='block', block_timeout=2)
+    stall(stub, shipper)
+    shipper.submit({"n": 1})
+    threading.Timer(0.1, stub.open.set).start()
+    assert shipper.submit({"n": 2})
+    wait_for(lambda: len(stub.batches) == 3)
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        LogShipper('http://127.0.0.1:9', policy='drop-oldest')
+
+
+def test_503_is_retried_honouring_retry_after(stub):
+    stub.statuses = [503, 503]
+    sent, retries = counter(LOG_EVENTS_SENT), counter(LOG_SEND_RETRIES)
+    shipper = LogShipper(stub.url, batch_size=1, flush_interval=0.01)
+    shipper.submit({"n": 0})
+    wait_for(lambda: stub.batches)
+    assert stub.events() == [0]
+    assert counter(LOG_SEND_RETRIES) == retries + 2
+    wait_for(lambda: counter(LOG_EVENTS_SENT) == sent + 1)
+
+
+def test_batch_is_dropped_once_retries_run_out(stub):
+    stub.statuses = [503, 503, 503]
+    failed = counter(LOG_EVENTS_DROPPED, reason='send_failed')
+    shipper = LogShipper(stub.url, batch_size=1, flush_interval=0.01, max_retries=2)
+    shipper.submit({"n": 0})
+    wait_for(lambda: counter(LOG_EVENTS_DROPPED, reason='send_failed') == failed + 1)
+    assert stub.batches == []
+
+
+def test_close_drains_the_queue(stub):
+    shipper = LogShipper(stub.url, batch_size=2, flush_interval=0.2)
+    for n in range(5):
+        shipper.submit({"n": n})
+    shipper.close()
+    assert sorted(stub.events()) == [0, 1, 2, 3, 4]
+    assert not shipper.submit({"n": 5})
+
+
+def test_unserializable_event_does_not_kill_the_thread(stub):
+    errors = counter(LOG_EVENTS_DROPPED, reason='error')
+    shipper = LogShipper(stub.url, batch_size=1, flush_interval=0.01)
+    shipper.submit({"n": object()})
+    wait_for(lambda: counter(LOG_EVENTS_DROPPED, reason='error') == errors + 1)
+    shipper.submit({"n": 1})
+    wait_for(lambda: stub.batches)
+    assert shipper._thread.is_alive()
+    assert stub.events() == [1]
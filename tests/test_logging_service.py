@@ -0,0 +1,196 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+LOG_DIR = tempfile.mkdtemp()
+os.environ['LOG_FILE'] = os.path.join(LOG_DIR, 'crud-logs.log')
+os.environ['LOG_INDEX_PATH'] = os.path.join(LOG_DIR, 'crud-logs.index.sqlite')
+os.environ['LOG_WRITER_FLUSH_INTERVAL'] = '0.05'
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logging-service'))
+
+import log_service  # noqa: E402
+from event_index import EventIndex, decode_cursor  # noqa: E402
+from event_writer import EventWriter  # noqa: E402
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def bodies(index, **filters):
+    events, _ = index.query(limit=1000, **filters)
+    return [json.loads(event) for event in events]
+
+
+def add(index, records):
+    index.add(records, [json.dumps(record) for record in records])
+
+
+@pytest.fixture
+def index(tmp_path):
+    return EventIndex(str(tmp_path / 'index.sqlite'), retain_segments=2)
+
+
+@pytest.fixture
+def events(index):
+    records = [
+        {"event": "user_added", "user_id": 1, "timestamp": "2026-01-01T00:00:00"},
+        {"event": "user_updated", "user_id": 1, "timestamp": "2026-01-01T01:00:00"},
+        {"event": "user_added", "user_id": 2, "timestamp": "2026-01-01T02:00:00+00:00"},
+        {"event": "user_added", "user_id": 3, "timestamp": "2026-01-01T04:00:00+01:00"},
+        {"event": "user_deleted", "user_id": 2, "timestamp": "2026-01-01T04:00:00Z"},
+    ]
+    add(index, records)
+    return records
+
+
+def test_query_filters(index, events):
+    assert [e['user_id'] for e in bodies(index, event='user_added')] == [3, 2, 1]
+    assert [e['event'] for e in bodies(index, user_id=1, order='asc')] == ['user_added', 'user_updated']
+    # Offsets are normalised to UTC, so +01:00 at 04:00 is 03:00Z
+    window = bodies(index, since='2026-01-01T01:00:00Z', until='2026-01-01T04:00:00Z')
+    assert [e['user_id'] for e in window] == [3, 2, 1]
+
+
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_cursor_pages_cover_every_event_once(index, events, order):
+    seen, cursor = [], None
+    while True:
+        page, cursor = index.query(limit=2, order=order, cursor=cursor)
+        seen.extend(json.loads(event)['timestamp'] for event in page)
+        if not cursor:
+            break
+    assert len(seen) == len(events)
+    assert [e['timestamp'] for e in bodies(index, order=order)] == seen
+
+
+def test_invalid_cursor_is_rejected(index):
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+
+def test_unparseable_timestamps_do_not_lose_the_batch(index):
+    add(index, [
+        {"event": "a", "timestamp": "nope", "received_at": "2026-01-01T00:00:00"},
+        {"event": "b", "timestamp": "nope", "received_at": "garbage"},
+        {"event": "c", "timestamp": 12},
+        {"event": "d"},
+    ])
+    assert sorted(e['event'] for e in bodies(index)) == ['a', 'b', 'c', 'd']
+    # Falls back to received_at, then to the time of indexing
+    assert [e['event'] for e in bodies(index, until='2026-01-02T00:00:00')] == ['a']
+
+
+def test_rotate_keeps_only_the_newest_segments(index):
+    for segment in range(4):
+        add(index, [{"event": f"segment-{segment}"}] * 3)
+        index.rotate(f"crud-logs.log.{segment}")
+    add(index, [{"event": "active"}])
+    assert sorted({e['event'] for e in bodies(index)}) == ['active', 'segment-2', 'segment-3']
+
+
+def test_rotate_without_retention_keeps_everything(tmp_path):
+    index = EventIndex(str(tmp_path / 'index.sqlite'), retain_segments=0)
+    for segment in range(3):
+        add(index, [{"event": f"segment-{segment}"}])
+        index.rotate(f"crud-logs.log.{segment}")
+    assert len(bodies(index)) == 3
+
+
+@pytest.fixture
+def service():
+    return log_service.app.test_client()
+
+
+def test_posted_events_are_queryable(service):
+    user_id = int(time.time() * 1000)
+    assert service.post('/logs', json={"event": "user_added", "user_id": user_id}).status_code == 200
+    assert service.post('/logs/batch', json=[
+        {"event": "user_updated", "user_id": user_id}, {"event": "user_deleted", "user_id": user_id},
+    ]).json == {"status": "logged", "count": 2}
+
+    def logged():
+        return service.get(f'/logs?user_id={user_id}').get_data(as_text=True).splitlines()
+
+    wait_for(lambda: len(logged()) == 3)
+    first = service.get(f'/logs?user_id={user_id}&order=asc&limit=1')
+    assert json.loads(first.get_data(as_text=True))['event'] == 'user_added'
+    rest = service.get(f"/logs?user_id={user_id}&order=asc&cursor={first.headers['X-Next-Cursor']}")
+    assert [json.loads(line)['event'] for line in rest.get_data(as_text=True).splitlines()] == \
+        ['user_updated', 'user_deleted']
+
+
+@pytest.mark.parametrize('query', ['order=sideways', 'cursor=garbage', 'user_id=abc', 'since=yesterday'])
+def test_bad_query_arguments(service, query):
+    assert service.get(f'/logs?{query}').status_code == 400
+
+
+@pytest.fixture
+def stalled_writer(tmp_path, monkeypatch):
+    """An EventWriter with room for 3 events whose writer thread never drains the queue."""
+    writer = EventWriter(str(tmp_path / 'stalled.log'), max_queue=3, flush_interval=0.05)
+    monkeypatch.setattr(writer, '_collect', lambda: time.sleep(0.05) or [])
+    monkeypatch.setattr(log_service, 'writer', writer)
+    return writer
+
+
+def test_submit_is_all_or_nothing(stalled_writer):
+    assert stalled_writer.submit([{"n": 1}, {"n": 2}])
+    assert not stalled_writer.submit([{"n": 3}, {"n": 4}])
+    assert stalled_writer._queue.qsize() == 2
+    assert stalled_writer.submit([{"n": 3}])
+
+
+def test_full_queue_answers_503_without_writing_any_event(service, stalled_writer):
+    stalled_writer.submit([{"n": 1}, {"n": 2}])
+    response = service.post('/logs/batch', json=[{"n": 3}, {"n": 4}])
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert stalled_writer._queue.qsize() == 2
+
+
+def test_batch_larger_than_the_queue_is_413(service, stalled_writer):
+    assert service.post('/logs/batch', json=[{"n": n} for n in range(4)]).status_code == 413
+    assert stalled_writer.submit([{"n": n} for n in range(3)])
+
+
+def test_ingest_rejects_bodies_of_the_wrong_shape(service):
+    assert service.post('/logs/batch', json={"event": "x"}).status_code == 400
+    assert service.post('/logs', data='not json', content_type='application/json').status_code == 400
+
+
+def read_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_writer_adds_received_at_and_drains_on_close(tmp_path):
+    writer = EventWriter(str(tmp_path / 'events.log'), flush_interval=5)
+    writer.submit([{"event": "a"}, {"event": "b", "received_at": "client"}, "raw"])
+    writer.close()
+    lines = read_lines(tmp_path / 'events.log')
+    assert [line.get('event') for line in lines] == ['a', 'b', None]
+    assert lines[1]['received_at'] == 'client' and 'received_at' in lines[0]
+    assert lines[2]['data'] == 'raw'
+
+
+def test_writer_rotates_segments_and_prunes_the_index(tmp_path):
+    index = EventIndex(str(tmp_path / 'index.sqlite'), retain_segments=1)
+    logs = tmp_path / 'logs'
+    writer = EventWriter(str(logs / 'events.log'), max_bytes=1, flush_interval=0.01,
+                         compress=False, index=index)
+    for n in range(3):
+        writer.submit([{"event": f"batch-{n}"}])
+        # Every write crosses max_bytes, so each batch ends up in its own segment
+        wait_for(lambda: len(os.listdir(logs)) == n + 2)
+    writer.close()
+    segments = sorted(name for name in os.listdir(logs) if name != 'events.log')
+    assert [read_lines(logs / segment)[0]['event'] for segment in segments] == ['batch-0', 'batch-1', 'batch-2']
+    assert [e['event'] for e in bodies(index)] == ['batch-2']
@@ -0,0 +1,68 @@
+import importlib.util
+import os
+
+from prometheus_client import REGISTRY
+
+import app as app_module
+from db_metrics import DB_POOL_CHECKED_OUT, DB_POOL_OVERFLOW
+
+
+def gauge(metric, **labels):
+    return (metric.labels(**labels) if labels else metric)._value.get()
+
+
+def test_pool_gauges_return_to_idle_after_a_request(client, add_users):
+    add_users(('alice', 'alice@example.com', None))
+    assert client.get('/users?count=1').status_code == 200
+    with app_module.app.app_context():
+        pool = app_module.db.engine.pool
+        assert gauge(DB_POOL_CHECKED_OUT) == pool.checkedout() == 0
+        assert gauge(DB_POOL_OVERFLOW) == pool.overflow()
+
+
+def test_pool_gauges_track_open_checkouts(client):
+    with app_module.app.app_context():
+        engine = app_module.db.engine
+        with engine.connect(), engine.connect():
+            assert gauge(DB_POOL_CHECKED_OUT) == 2
+        assert gauge(DB_POOL_CHECKED_OUT) == 0
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_probes_and_scrapes_are_not_counted(client):
+    assert client.get('/health').status_code == 200
+    assert client.get('/metrics').status_code == 200
+    for path in app_module.UNTRACKED_PATHS:
+        assert sample('requests_total', method='GET', endpoint=path) == 0
+        assert sample('http_request_duration_seconds_count', method='GET', route=path, status='200') == 0
+
+
+def test_requests_are_labelled_by_route_template(client, add_users):
+    user_id, = add_users(('alice', 'alice@example.com', None))
+    before = sample('requests_total', method='GET', endpoint='/users/<int:user_id>')
+    assert client.get(f'/users/{user_id}').status_code == 200
+    assert client.get('/users/999999').status_code == 404
+    assert sample('requests_total', method='GET', endpoint='/users/<int:user_id>') == before + 2
+    assert sample('requests_total', method='GET', endpoint=f'/users/{user_id}') == 0
+
+
+def test_in_flight_returns_to_zero(client, add_users):
+    add_users(('alice', 'alice@example.com', None))
+    client.get('/users')
+    client.get('/users?stream=ndjson').get_data()
+    assert sample('http_requests_in_flight', method='GET', route='/users') == 0
+
+
+def test_gunicorn_only_clears_stale_samples(tmp_path, monkeypatch):
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    spec = importlib.util.spec_from_file_location(
+        'gunicorn_conf', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'gunicorn.conf.py'))
+    conf = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(conf)
+    (tmp_path / 'counter_1.db').write_text('')
+    (tmp_path / 'keep.txt').write_text('operator data')
+    conf.on_starting(None)
+    assert os.listdir(tmp_path) == ['keep.txt']
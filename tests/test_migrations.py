@@ -0,0 +1,19 @@
+from sqlalchemy import inspect, text
+
+import app as app_module
+
+
+def index_names():
+    with app_module.app.app_context():
+        return {index['name'] for index in inspect(app_module.db.engine).get_indexes('users')}
+
+
+def test_migrate_db_adds_missing_indexes():
+    with app_module.app.app_context():
+        with app_module.db.engine.begin() as connection:
+            connection.execute(text("DROP INDEX ix_users_name_id"))
+    assert 'ix_users_name_id' not in index_names()
+
+    result = app_module.app.test_cli_runner().invoke(args=['migrate-db'])
+    assert result.exit_code == 0, result.output
+    assert {'ix_users_created_at_id', 'ix_users_name_id'} <= index_names()
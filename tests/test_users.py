@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+import app as app_module
+
+BASE = datetime(2026, 1, 1)
+
+# Ties on created_at and name make the id tie-breaker part of every ordering
+USERS = [
+    ('carol', 'carol@beta.org', BASE),
+    ('alice', 'alice@example.com', BASE),
+    ('bob', 'bob@example.com', BASE + timedelta(days=1)),
+    ('alice', 'alice2@beta.org', BASE + timedelta(days=2)),
+    ('dave', 'dave@example.com', BASE + timedelta(days=2)),
+    ('al_x', 'al_x@example.com', BASE + timedelta(days=3)),
+    ('100%', 'percent@example.com', BASE + timedelta(days=4)),
+]
+
+
+@pytest.fixture
+def users(client, add_users):
+    ids = add_users(*USERS)
+    return [dict(id=user_id, name=name, email=email, created_at=created_at)
+            for user_id, (name, email, created_at) in zip(ids, USERS)]
+
+
+def walk(client, query, limit=2):
+    """Follow X-Next-Cursor from the first page to the last and return every id served."""
+    ids, cursor = [], None
+    while True:
+        url = f"/users?{query}&limit={limit}" + (f"&cursor={cursor}" if cursor else '')
+        response = client.get(url)
+        assert response.status_code == 200, response.json
+        ids.extend(u['id'] for u in response.json)
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return ids
+
+
+@pytest.mark.parametrize('sort', ['created_at', '-created_at', 'name', '-name', 'email', '-email'])
+def test_keyset_pages_cover_every_row_in_order(client, users, sort):
+    field = sort.lstrip('-')
+    expected = sorted(users, key=lambda u: (u[field], u['id']), reverse=sort.startswith('-'))
+    assert walk(client, f"sort={sort}") == [u['id'] for u in expected]
+
+
+@pytest.mark.parametrize('sort', ['created_at', '-created_at'])
+def test_keyset_pages_keep_sub_second_timestamps(client, add_users, sort):
+    ids = add_users(
+        ('a', 'a@example.com', BASE + timedelta(milliseconds=500)),
+        ('b', 'b@example.com', BASE + timedelta(milliseconds=200)),
+        ('c', 'c@example.com', BASE),
+        ('d', 'd@example.com', BASE + timedelta(milliseconds=200)),
+    )
+    # SQLite rows written by the server default have no fractional part
+    with app_module.app.app_context():
+        app_module.db.session.execute(text(
+            "INSERT INTO users (name, email) VALUES ('e', 'e@example.com')"))
+        app_module.db.session.commit()
+    served = walk(client, f"sort={sort}", limit=1)
+    assert len(served) == len(set(served)) == client.get('/users?count=1').json['count'] == 5
+    oldest_first = [ids[2], ids[1], ids[3], ids[0]]
+    expected = oldest_first if sort == 'created_at' else oldest_first[::-1]
+    assert [i for i in served if i in ids] == expected
+
+
+def test_default_order_is_newest_first(client, users):
+    assert walk(client, '') == walk(client, 'sort=-created_at')
+
+
+def test_link_header_keeps_filters(client, users):
+    response = client.get('/users?sort=name&q=a&limit=1')
+    assert 'sort=name' in response.headers['Link'] and 'q=a' in response.headers['Link']
+
+
+def test_cursor_is_tied_to_its_sort(client, users):
+    cursor = client.get('/users?sort=name&limit=1').headers['X-Next-Cursor']
+    assert client.get(f'/users?sort=email&cursor={cursor}').status_code == 400
+    assert client.get('/users?cursor=garbage').status_code == 400
+
+
+@pytest.mark.parametrize('query, expected', [
+    ('q=al', {'alice', 'al_x'}),
+    ('q=AL', {'alice', 'al_x'}),
+    ('q=al_', {'al_x'}),
+    ('q=100%25', {'100%'}),
+    ('q=beta&match=substring', {'carol', 'alice'}),
+    ('q=beta', set()),
+    ('created_after=2026-01-02T00:00:00', {'bob', 'alice', 'dave', 'al_x', '100%'}),
+    ('created_before=2026-01-02', {'carol', 'alice'}),
+    ('created_after=2026-01-02&created_before=2026-01-04', {'bob', 'alice', 'dave'}),
+    ('created_after=2026-01-02T00:00:00Z', {'bob', 'alice', 'dave', 'al_x', '100%'}),
+])
+def test_search_and_range_filters(client, users, query, expected):
+    rows = client.get(f'/users?{query}&limit=500').json
+    assert {u['name'] for u in rows} == expected
+    assert client.get(f'/users?{query}&count=1').json == {"count": len(rows)}
+
+
+def test_filtered_pages_stay_filtered(client, users):
+    ids = walk(client, 'q=example&match=substring&sort=name', limit=1)
+    assert ids == [u['id'] for u in sorted(users, key=lambda u: (u['name'], u['id'])) if 'example' in u['email']]
+
+
+@pytest.mark.parametrize('query', [
+    'sort=password', 'match=fuzzy&q=a', 'created_after=yesterday', 'created_before=2026-13-01',
+])
+def test_bad_arguments_are_rejected(client, users, query):
+    assert client.get(f'/users?{query}').status_code == 400
+
+
+def test_count_without_filters(client, users):
+    assert client.get('/users?count=true').json == {"count": len(USERS)}
+
+
+def test_get_single_user(client, users):
+    user = users[2]
+    response = client.get(f"/users/{user['id']}")
+    assert response.json['email'] == user['email']
+    assert client.get('/users/999999').status_code == 404
+
+
+def test_filtered_export_stream(client, users):
+    body = client.get('/users?stream=ndjson&q=beta&match=substring').get_data(as_text=True)
+    assert len(body.strip().splitlines()) == 2
+
+
+def test_dashboard_renders(client, users):
+    response = client.get('/dashboard')
+    assert response.status_code == 200
+    assert b'example.com' in response.data
@@ -0,0 +1,168 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe per-process LRU with a per-entry TTL."""
+
+    def __init__(self, maxsize=1024, ttl=30, on_evict=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                self._evicted('expired')
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evicted('capacity')
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _evicted(self, reason):
+        if self.on_evict:
+            self.on_evict(reason)
+
+
+class MemoryStore:
+    """In-process stand-in for a shared cache store, used when no external store is configured in tests."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.time()
+        with self._lock:
+            values = []
+            for key in keys:
+                item = self._data.get(key)
+                values.append(item[1] if item and (item[0] is None or item[0] > now) else None)
+            return values
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (time.time() + ttl if ttl else None, value)
+
+    def incr(self, key):
+        with self._lock:
+            value = int(self._data.get(key, (None, 0))[1]) + 1
+            self._data[key] = (None, value)
+            return value
+
+
+class RedisStore:
+    """Shared store backed by Redis. Requires the optional ``redis`` package."""
+
+    def __init__(self, url):
+        import redis
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get_many(self, keys):
+        return [json.loads(value) if value is not None else None for value in self._client.mget(keys)]
+
+    def set(self, key, value, ttl=None):
+        self._client.set(key, json.dumps(value), ex=ttl)
+
+    def incr(self, key):
+        return self._client.incr(key)
+
+
+class ResponseCache:
+    """Two-tier cache of rendered responses, invalidated by a generation counter.
+
+    Every write bumps the generation, and the generation is part of every key
+    and ETag, so stale entries are never served again and simply age out.
+    With a shared ``store`` the counter lives there and all replicas see each
+    other's writes. Without one it is local to the process and prefixed with
+    a random token, so ETags issued by other processes never match and
+    replicas only serve stale data for up to ``ttl`` seconds.
+    """
+
+    def __init__(self, maxsize=1024, ttl=30, store=None, namespace='users', on_evict=None):
+        self.ttl = ttl
+        self.store = store
+        self.namespace = namespace
+        self.local = LRUCache(maxsize, ttl, on_evict)
+        self._token = uuid.uuid4().hex[:8]
+        self._generation = 0
+        self._modified = time.time()
+        self._lock = threading.Lock()
+
+    @property
+    def _generation_key(self):
+        return f"{self.namespace}:generation"
+
+    @property
+    def _modified_key(self):
+        return f"{self.namespace}:modified"
+
+    def generation(self):
+        """Return the current ``(generation, last_modified)`` pair."""
+        if self.store is None:
+            return f"{self._token}.{self._generation}", self._modified
+        generation, modified = self.store.get_many([self._generation_key, self._modified_key])
+        return str(generation or 0), float(modified or self._modified)
+
+    def get(self, key):
+        """Look ``key`` up locally, then in the shared store. Returns ``(entry, tier)``."""
+        entry = self.local.get(key)
+        if entry is not None:
+            return entry, 'local'
+        if self.store is not None:
+            entry = self.store.get_many([f"{self.namespace}:entry:{key}"])[0]
+            if entry is not None:
+                self.local.set(key, entry)
+                return entry, 'shared'
+        return None, None
+
+    def set(self, key, entry):
+        self.local.set(key, entry)
+        if self.store is not None:
+            self.store.set(f"{self.namespace}:entry:{key}", entry, ttl=self.ttl)
+
+    def invalidate(self):
+        try:
+            if self.store is None:
+                with self._lock:
+                    self._generation += 1
+                    self._modified = time.time()
+            else:
+                self.store.incr(self._generation_key)
+                self.store.set(self._modified_key, time.time())
+        except Exception as e:
+            # Entries for the old generation stay reachable until their TTL runs out
+            logging.error(f"Cache invalidation failed: {str(e)}")
+        self.local.clear()
+
+
+def store_from_url(url):
+    if not url:
+        return None
+    if url == 'memory':
+        return MemoryStore()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisStore(url)
+    raise ValueError(f"Unsupported cache store: {url}")